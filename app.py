@@ -1,216 +1,89 @@
+import io
+import os
 import joblib
 import pandas as pd
 import numpy as np
 import streamlit as st
 import matplotlib.pyplot as plt
 import plotly.express as px
-from sklearn.metrics import silhouette_score, davies_bouldin_score
-from sklearn.decomposition import PCA
-
-def treat_columns(df, is_original=False):
-  if is_original:
-    df = df.dropna()
-
-  # If buys on campaign
-  df['Buys_on_campaign'] = df['AcceptedCmp1'] + df['AcceptedCmp2'] + df['AcceptedCmp3'] + df['AcceptedCmp4'] + df['AcceptedCmp5'] + df['Response']
-  df = df.drop(['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'Response'], axis=1)
-
-  # Buys with discount
-  df['Num_purchases'] = df['NumCatalogPurchases'] + df['NumStorePurchases'] + df['NumWebPurchases']
-  
-  df = df[df['Num_purchases'] != 0]
-  df = df[df['NumDealsPurchases'] < df['Num_purchases']]
-  
-  df['Purchases_with_descount'] = df['NumDealsPurchases']/df['Num_purchases']*100
-  df['Purchases_with_descount'] = df['Purchases_with_descount'].clip(lower=0.1, upper=79)
-  
-  bins = [0, 20, 40, 60, 80]
-  labels = ['0-20', '20-40', '40-60', '60-80']
-  df['Purchases_with_descount'] = pd.cut(df['Purchases_with_descount'], bins=bins, labels=labels, right=False)
-  df['Purchases_with_descount'] = df['Purchases_with_descount'].replace({
-      '0-20' : 0,
-      '20-40' : 1,
-      '40-60' : 2,
-      '60-80' : 3
-      }).astype(int)
-      
-  # Buys_where
-  df['Catalog'] = df['NumCatalogPurchases']/df['Num_purchases']
-  df['Store'] = df['NumStorePurchases']/df['Num_purchases']
-  df['Web'] = df['NumWebPurchases']/df['Num_purchases']
-  
-  df['Preference'] = df[['Catalog', 'Store', 'Web']].idxmax(axis=1)
-  df['Preference'] = df['Preference'].replace({
-      'Catalog' : 0,
-      'Store' : 1,
-      'Web' : 2
-      }).astype(int)
-      
-  df = df.drop(['Num_purchases', 'NumCatalogPurchases', 'NumStorePurchases', 'NumWebPurchases', 'NumDealsPurchases', 'Catalog', 'Store', 'Web'], axis=1)
-
-  # How long is client
-  df['Dt_Customer'] = pd.to_datetime(df['Dt_Customer'], format='%d-%m-%Y')
-  today = df['Dt_Customer'].max()
-  
-  df['Is_client_since'] = (today - df['Dt_Customer']).dt.days
-  df['Is_client_since'] = df['Is_client_since'].clip(lower=0.1, upper=1099.99)
-  bins = [0, 275, 550, 825, 1100]
-  labels = ['0-275', '275-550', '550-825', '825-1100']
-  df['Is_client_since'] = pd.cut(df['Is_client_since'], bins=bins, labels=labels, right=False)
-  df['Is_client_since'] = df['Is_client_since'].replace({
-      '0-275' : 0,
-      '275-550' : 1,
-      '550-825' : 2,
-      '825-1100' : 3
-      }).astype(int)
-      
-  df = df.drop('Dt_Customer', axis=1)
-
-  # Is the client recently buying or not
-  bins = list(range(0, 101, 25))
-  labels = [f"{i}-{i+25}" for i in bins[:-1]]
-
-  df['Recency'] = df['Recency'].clip(lower=0.1, upper=99.99)
-  df['Recency'] = pd.cut(df['Recency'], bins=bins, labels=labels, right=False)
-  df['Is_buying'] = df['Recency'].replace({
-      '0-25' : 0,
-      '25-50' : 1,
-      '50-75' : 2,
-      '75-100' : 3
-      }).astype(int)
-      
-  df = df.drop('Recency', axis=1)
-
-  # Family size
-  df['Num_adults'] = df['Marital_Status'].replace({
-      'Married' : 2,
-      'Together' : 2,
-      'Single' : 1,
-      'Divorced' : 1,
-      'Widow' : 1,
-      'Alone' : 1,
-      'Absurd' : 1,
-      'YOLO' : 1
-      }).astype(int)
-      
-  df['Num_kids'] = df['Kidhome'] + df['Teenhome']
-  df['Family_size'] = df['Num_adults'] + df['Num_kids']
-  
-  # Have kids or not
-  df['Is_kids'] = np.where(df['Num_kids'] == 0, 0, 1)
-  
-  # Amount spent per person
-  df['Amount_spent'] = df['MntWines'] + df['MntFruits'] + df['MntMeatProducts'] + df['MntFishProducts'] + df['MntSweetProducts'] + df['MntGoldProds']
-  
-  df['Amount_spent_per_person'] = df['Amount_spent']/df['Family_size']
-  df['Amount_spent_per_person'] = df['Amount_spent_per_person'].clip(upper=699.99)
-  bins = [0, 175, 350, 525, 700]
-  labels = ['0-175', '175-350', '350-525', '525-700']
-  
-  df['Amount_spent_per_person'] = pd.cut(df['Amount_spent_per_person'], bins=bins, labels=labels, right=False)
-  df['Amount_spent_per_person'] = df['Amount_spent_per_person'].replace({
-      '0-175' : 0,
-      '175-350' : 1,
-      '350-525' : 2,
-      '525-700' : 3
-      }).astype(int)
-      
-  # Amount spent vs Income
-  df = df[df['Income'] <= 200000]
-  df = df.copy()
-  df['Spent_vs_income'] = df['Amount_spent']*100/df['Income']
-  df['Spent_vs_income'] = df['Spent_vs_income'].clip(upper=3.99)
-  bins = [0, 1, 2, 3, 4]
-  labels = ['0-1', '1-2', '2-3', '3-4']
-  df['Spent_vs_income'] = pd.cut(df['Spent_vs_income'], bins=bins, labels=labels, right=False)
-  df['Spent_vs_income'] = df['Spent_vs_income'].replace({
-      '0-1' : 0,
-      '1-2' : 1,
-      '2-3' : 2,
-      '3-4' : 3 
-      }).astype(int)
-      
-  # Drinks or not
-  df['Drinks'] = np.where(df['MntWines'] == 0, 0, 1)
-  
-  to_drop = ['Marital_Status', 'Kidhome', 'Teenhome', 'Num_kids', 'Num_adults',  'Amount_spent', 'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds', 'Income']
-  df = df.drop(to_drop, axis=1)
-
-  # Age from clients
-  df['Year_Birth'] = df['Year_Birth'].clip(lower=1900, upper=2000)
-  df = df.copy()
-  
-  bins = list(range(1900, 2001, 25))
-  labels = [f"{i}-{i+25}" for i in bins[:-1]]
-  
-  df['Year_Birth'] = pd.cut(df['Year_Birth'], bins=bins, labels=labels, right=False)
-  
-  df['Year_Birth'] = df['Year_Birth'].replace({
-      '1900-1925' : 0,
-      '1925-1950' : 1,
-      '1950-1975' : 2,
-      '1975-2000' : 3
-      }).astype(int)
-
-  df['Education'] = df['Education' ].replace({
-      'Basic' : 0,
-      '2n Cycle' : 1,
-      'Graduation' : 2,
-      'Master' : 3,
-      'PhD' : 4
-      }).astype(int)
-
-  ids = df['ID']
-  df = df.drop(['ID', 'NumWebVisitsMonth', 'Z_CostContact', 'Z_Revenue'], axis=1)
-  
-  return df, ids
-
-
-def scale_columns(df1):
-  df2 = df1.copy()
-  df2['Year_Birth'] = df2['Year_Birth']
-  df2['Education'] = df2['Education']
-  df2['Complain'] = df2['Complain']
-  df2['Buys_on_campaign'] = df2['Buys_on_campaign']
-  df2['Purchases_with_descount'] = df2['Purchases_with_descount']
-  df2['Preference'] = df2['Preference']
-  df2['Is_client_since'] = df2['Is_client_since']
-  df2['Is_buying'] = df2['Is_buying'] * 5
-  df2['Family_size'] = df2['Family_size']
-  df2['Is_kids'] = df2['Is_kids'] * 5
-  df2['Amount_spent_per_person'] = df2['Amount_spent_per_person']
-  df2['Spent_vs_income'] = df2['Spent_vs_income']
-  df2['Drinks'] = df2['Drinks'] * 5
-
-  return df2
-
-# Carregar modelo e dados
-pipeline = joblib.load('kmeans_pipeline.pkl')
-
-# Clusterizar dados originais
-original_df = pd.read_csv('marketing_campaign.csv', sep='\t')
-original_treated, ids = treat_columns(original_df, is_original=True)
-original_scaled = scale_columns(original_treated)
-df_antes = original_treated.copy()
-df_depois = original_scaled.copy()
-
-treated_labels = pipeline.predict(original_treated)
-original_treated['cluster'] = treated_labels
-original_treated['ID'] = ids
-
-original_labels = pipeline.predict(original_scaled)
-original_scaled['cluster'] = original_labels
-original_scaled['ID'] = ids
-
-descricao_clusters = {
-            1: "Grupo 1: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e têm comprado recentemente.  Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: é um grupo de clientes já fiel, que tem feito compras recentes. A oferta de cupons de desconto e veiculação de campanhas promocionais para esse grupo de clientes deve gerar bons resultados. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
-            2: "Grupo 2: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e faz bastante tempo que não têm comprado na loja.  Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: por ser um grupo que está há muito sem comprar na loja, mas prioriza a compras com descontos, a oferta de cupons de desconto pode ser atrativa. Campanhas promocionais geram poucos resultados nesse grupo. Programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
-            3: "Grupo 3: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar um valor de médio a alto por integrante familiar e reservam valor médio a pequeno da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: é um grupo de alta renda, que, apesar de gastar bastante por integrante familiar, as compras não comprometemsignificativamente a renda familiar. Há margem para expansão das vendas com a realização de campanhas promocionais. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Consomem bebidas alcoolicas, mas não itens infantis.",
-            4: "Grupo 4: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: Campanhas promocionais geram poucos resultados nesse grupo, mas a oferta de cupons de desconto pode ser atrativa. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
-            5: "Grupo 5: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: Campanhas promocionais geram poucos resultados nesse grupo, mas a oferta de cupons de desconto pode ser atrativa. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
-            6: "Grupo 6: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem bem a campanhas promocionais. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas. Consomem bebidas alcoolicas, mas não itens infantis.",
-            7: "Grupo 7: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem muito bem a campanhas promocionais, costumam comprar sem desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem muito bem a campanhas promocionais, comprando em quase todas elas. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Consomem bebidas alcoolicas, mas não itens infantis.",
-            8: "Grupo 8: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem muito bem a campanhas promocionais, comprando em quase todas elas. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Consomem bebidas alcoolicas, mas não itens infantis."}
+from descriptions import descricao_clusters
+from artifacts import file_fingerprint
+from model import FastScorer, cluster_centers
+from lookup import ClusterIndex, paginate, export_csv
+from metrics import metrics_path, compute_metrics, save_metrics, load_metrics
+from storage import is_current, convert
+from dataset import load_clustered
+from scenarios import PRESETS, run_scenario
+from projections import projections_path, compute_projections, save_projections, load_projections, stratified_sample
+from instrumentation import PROFILE, stage, snapshot, prometheus_text
+
+# Outra versão do pipeline (ex.: gerada pelo train.py) pode ser escolhida pela variável de ambiente
+MODEL_PATH = os.environ.get('MODEL_PATH', 'kmeans_pipeline.pkl')
+DATA_PATH = 'marketing_campaign.csv'
+
+
+# Carregar modelo (uma vez por versão do arquivo, compartilhado entre sessões)
+@st.cache_resource(max_entries=1)
+def load_pipeline(path, fingerprint):
+  return joblib.load(path)
+
+
+# Previsão rápida de um único cliente a partir dos centroides
+@st.cache_resource(max_entries=1)
+def load_fast_scorer(path, fingerprint):
+  return FastScorer(load_pipeline(path, fingerprint))
+
+
+# Clusterizar dados originais (refeito só quando o CSV ou o modelo mudam)
+# Guarda as features tratadas uma vez (int8, memmap) e só os vetores de clusters; a escala é aplicada sob demanda
+@st.cache_resource(max_entries=1)
+def load_clusters(data_path, data_fingerprint, model_path, model_fingerprint):
+  pipeline = load_pipeline(model_path, model_fingerprint)
+
+  # Lê os arrays tipados com memmap; o TSV só é lido de novo quando muda
+  store_path = os.path.splitext(data_path)[0] + '.store'
+  if not is_current(store_path, data_path):
+    with stage('csv_convert') as info:
+      info['rows'] = convert(data_path, store_path)['rows']
+  return load_clustered(store_path, pipeline)
+
+
+# Projeções PCA 3D salvas ao lado do modelo, calculadas uma vez por versão dos dados/modelo
+@st.cache_resource(max_entries=1)
+def load_pca(data_path, data_fingerprint, model_path, model_fingerprint):
+  path = projections_path(data_path, model_path)
+  if not os.path.exists(path):
+    dados = load_clusters(data_path, data_fingerprint, model_path, model_fingerprint)
+    with stage('pca', rows=len(dados)):
+      pca_antes, pca_depois = compute_projections(dados.features, dados.scaled.to_numpy())
+    save_projections(path, pca_antes, pca_depois, dados.treated_labels, dados.original_labels)
+  return load_projections(path)
+
+
+# Silhouette e Davies-Bouldin, calculados uma vez por versão dos dados/modelo (acima de EXACT_LIMIT linhas, por amostra)
+@st.cache_resource(max_entries=1)
+def load_quality(data_path, data_fingerprint, model_path, model_fingerprint):
+  path = metrics_path(data_path, model_path)
+  if not os.path.exists(path):
+    dados = load_clusters(data_path, data_fingerprint, model_path, model_fingerprint)
+    with stage('quality_metrics', rows=len(dados)):
+      save_metrics(path, compute_metrics(dados.features, dados.scaled, dados.treated_labels, dados.original_labels))
+  return load_metrics(path)
+
+
+# Índice ID -> cluster para a busca por ID
+@st.cache_resource(max_entries=1)
+def load_index(data_path, data_fingerprint, model_path, model_fingerprint):
+  dados = load_clusters(data_path, data_fingerprint, model_path, model_fingerprint)
+  with stage('index_build', rows=len(dados)):
+    return ClusterIndex(dados.ids, dados.original_labels)
+
+
+model_fingerprint = file_fingerprint(MODEL_PATH)
+data_fingerprint = file_fingerprint(DATA_PATH)
+pipeline = load_pipeline(MODEL_PATH, model_fingerprint)
+fast_scorer = load_fast_scorer(MODEL_PATH, model_fingerprint)
+load_clusters(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
 
 st.set_page_config(layout="wide")
 st.title("Clusterização de Clientes")
@@ -220,7 +93,9 @@ menu = st.sidebar.selectbox("Escolha uma opção", [
     "Busque os dados de um grupo",
     "Busque grupos por característica",
     "Preveja a qual grupo um cliente pertence",
-    "Busque um cliente por ID"
+    "Busque um cliente por ID",
+    "Simule mudanças nos grupos",
+    "Administração: desempenho"
 ])
 
 dic_scholarity = {
@@ -252,7 +127,9 @@ if menu == "Entenda os dados":
     st.subheader("Entenda os dados")
     st.markdown("<br>", unsafe_allow_html=True)
 
-    st.markdown("""
+    qualidade = load_quality(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
+
+    st.markdown(f"""
     <div style='text-align: justify'>
       <h5>
         Neste projeto,
@@ -269,8 +146,8 @@ if menu == "Entenda os dados":
         <span style='color:#E57373;'>kmeans</span>, aplicando escalas maiores
         <span style='color:#E57373;'>em features consideradas mais importantes</span> para os objetos propostos. A metodologia aplicada permitiu que os dados, que antes eram muito próximos uns dos outros no espaço n-dimensional,
         <span style='color:#E57373;'>se agrupassem</span> como resposta a maior escala das features selecionadas.<br><br>
-        Antes da metodologia aplicada, o valor do <i>silhouette score</i> encontrado para os grupos <span style='color:#E57373;'>era de 0.01</span>, <span style='color:#E57373;'>passando a 0.48</span> após a metodologia.
-        E o <i>Davies-Bouldin score</i> passou de <span style='color:#E57373;'>1.96 a 0.90</span>.
+        Antes da metodologia aplicada, o valor do <i>silhouette score</i> encontrado para os grupos <span style='color:#E57373;'>era de {qualidade['antes']['silhouette']:.2f}</span>, <span style='color:#E57373;'>passando a {qualidade['depois']['silhouette']:.2f}</span> após a metodologia.
+        E o <i>Davies-Bouldin score</i> passou de <span style='color:#E57373;'>{qualidade['antes']['davies_bouldin']:.2f} a {qualidade['depois']['davies_bouldin']:.2f}</span>.
       </h5>
     </div>
     """, unsafe_allow_html=True)
@@ -286,11 +163,13 @@ if menu == "Entenda os dados":
     st.markdown("<div style='text-align: justify'><h5>Distribuição e agrupamento dos dados <span style='color:#E57373;'>antes</span> do tratamento: <br><br></h5></div>", unsafe_allow_html=True)
 
     # PCA
-    df_pca_3d = PCA(n_components=3).fit_transform(df_antes)
+    pca_antes, pca_depois, pca_treated_labels, pca_original_labels = load_pca(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
+    max_pontos = st.number_input("Máximo de pontos por gráfico (amostra estratificada por grupo)", min_value=100, value=20000, step=1000)
+    amostra = stratified_sample(pca_treated_labels, max_pontos)
 
     # DataFrame com colunas nomeadas e os labels
-    df_plot = pd.DataFrame(df_pca_3d, columns=['PC1', 'PC2', 'PC3'])
-    df_plot['cluster'] = treated_labels.astype(str)
+    df_plot = pd.DataFrame(pca_antes[amostra], columns=['PC1', 'PC2', 'PC3'])
+    df_plot['cluster'] = pca_treated_labels[amostra].astype(str)
 
     # Gráfico 3D com escala de vermelho
     fig = px.scatter_3d(
@@ -306,11 +185,11 @@ if menu == "Entenda os dados":
     st.markdown("<div style='text-align: justify'><h5>Distribuição e agrupamento dos dados <span style='color:#E57373;'>após</span> tratamento: <br><br></h5></div>", unsafe_allow_html=True)
   
     # PCA
-    df_pca_3d = PCA(n_components=3).fit_transform(df_depois)
+    amostra = stratified_sample(pca_original_labels, max_pontos)
 
     # DataFrame com colunas nomeadas e os labels
-    df_plot = pd.DataFrame(df_pca_3d, columns=['PC1', 'PC2', 'PC3'])
-    df_plot['cluster'] = original_labels.astype(str)
+    df_plot = pd.DataFrame(pca_depois[amostra], columns=['PC1', 'PC2', 'PC3'])
+    df_plot['cluster'] = pca_original_labels[amostra].astype(str)
 
     # Gráfico 3D com escala de vermelho
     fig = px.scatter_3d(
@@ -381,19 +260,18 @@ elif menu == "Preveja a qual grupo um cliente pertence":
       elif int(f17) + int(f18) + int(f19) == 0:
         st.write("Essa pessoa nunca fez compras em nossa loja")
       else:
-        input_df = pd.DataFrame([[int(f1), int(f2), dic_scholarity[f3], dic_marital[f4], float(f5), int(f6), int(f7), str(f8), int(f9), int(f10), int(f11), int(f12), int(f13), int(f14), int(f15), int(f16), int(f17), int(f18), int(f19), int(f20), int(dic_binary[f21]), int(dic_binary[f22]), int(dic_binary[f23]), int(dic_binary[f24]), int(dic_binary[f25]), int(dic_binary[f27]), int(f28), int(f29), int(dic_binary[f26])]], columns=['ID', 'Year_Birth', 'Education', 'Marital_Status', 'Income', 'Kidhome', 'Teenhome', 'Dt_Customer', 'Recency', 'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds', 'NumDealsPurchases', 'NumWebPurchases', 'NumCatalogPurchases', 'NumStorePurchases', 'NumWebVisitsMonth', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'AcceptedCmp1', 'AcceptedCmp2', 'Complain', 'Z_CostContact', 'Z_Revenue', 'Response'])
-      
-        treated_input_df, ids = treat_columns(input_df, is_original=False)
-        input_df_scaled = scale_columns(treated_input_df)
+        colunas = ['ID', 'Year_Birth', 'Education', 'Marital_Status', 'Income', 'Kidhome', 'Teenhome', 'Dt_Customer', 'Recency', 'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds', 'NumDealsPurchases', 'NumWebPurchases', 'NumCatalogPurchases', 'NumStorePurchases', 'NumWebVisitsMonth', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'AcceptedCmp1', 'AcceptedCmp2', 'Complain', 'Z_CostContact', 'Z_Revenue', 'Response']
+        input_record = dict(zip(colunas, [int(f1), int(f2), dic_scholarity[f3], dic_marital[f4], float(f5), int(f6), int(f7), str(f8), int(f9), int(f10), int(f11), int(f12), int(f13), int(f14), int(f15), int(f16), int(f17), int(f18), int(f19), int(f20), int(dic_binary[f21]), int(dic_binary[f22]), int(dic_binary[f23]), int(dic_binary[f24]), int(dic_binary[f25]), int(dic_binary[f27]), int(f28), int(f29), int(dic_binary[f26])]))
 
-        input_label = pipeline.predict(input_df_scaled)
-        label = int(input_label) + 1
-        input_df['cluster'] = label
-        input_df['ID'] = ids
+        input_label = fast_scorer.predict_record(input_record)
+        if input_label is None:
+          st.write("Esse cliente está fora dos critérios do modelo (todas as compras com desconto ou renda acima de 200000)")
+        else:
+          label = input_label + 1
 
-        st.write(f"O grupo ao qual o cliente pertence é: grupo {label}")
-        texto_explicativo = descricao_clusters.get(label, "Descrição não disponível para este grupo.")
-        st.write(texto_explicativo)
+          st.write(f"O grupo ao qual o cliente pertence é: grupo {label}")
+          texto_explicativo = descricao_clusters.get(label, "Descrição não disponível para este grupo.")
+          st.write(texto_explicativo)
 
 
 elif menu == "Busque grupos por característica":
@@ -419,12 +297,23 @@ elif menu == "Busque grupos por característica":
       lista_clusteres.append(l)
       
     if opcao:
-        resultados = original_scaled[original_scaled['cluster'].isin(lista_clusteres)]
-        lista = resultados['ID'].tolist()
-      
+        indice = load_index(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
+        lista = indice.members_of(lista_clusteres)
+
         st.write(f"Grupos correspondentes: {clusters_escolhidos}")
-        st.write("IDs dos clientes encontrados:")
-        st.dataframe(pd.DataFrame(sorted(lista), columns=['ID']))
+        st.write(f"IDs dos clientes encontrados: {len(lista)}")
+
+        tamanho_pagina = 1000
+        paginas = max(1, -(-len(lista) // tamanho_pagina))
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1)
+        st.dataframe(pd.DataFrame(paginate(lista, pagina, tamanho_pagina), columns=['ID']))
+
+        def gerar_csv():
+          saida = io.StringIO()
+          export_csv(lista, saida)
+          return saida.getvalue()
+
+        st.download_button("Exportar IDs em CSV", data=gerar_csv, file_name="clientes.csv", mime="text/csv")
 
 
 elif menu == "Busque um cliente por ID":
@@ -434,12 +323,71 @@ elif menu == "Busque um cliente por ID":
     # Entrada do usuário
     id_cliente = st.number_input("Digite o ID do cliente:", min_value=0, step=1)
 
-    if id_cliente in original_scaled['ID'].values:
-        cluster = original_scaled[original_scaled['ID'] == id_cliente]['cluster'].iloc[0]
-        st.success(f"O cliente {id_cliente} pertence ao cluster {cluster}")
+    indice = load_index(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
+    cluster = indice.get(id_cliente)
+
+    if cluster is not None:
+        # Grupos numerados de 1 a 8, como no formulário de previsão e nas descrições
+        grupo = cluster + 1
+        st.success(f"O cliente {id_cliente} pertence ao grupo {grupo}")
 
         # Mostra a explicação
-        texto_explicativo = descricao_clusters.get(cluster, "Descrição não disponível para este grupo.")
+        texto_explicativo = descricao_clusters.get(grupo, "Descrição não disponível para este grupo.")
         st.write(texto_explicativo)
     else:
         st.write("ID inválido / Cliente não encontrado")
+
+
+elif menu == "Simule mudanças nos grupos":
+    st.subheader("Simule mudanças nos grupos")
+    st.write("Aplica o cenário a todos os clientes dos grupos escolhidos e mostra para qual grupo cada um migraria.")
+
+    cenarios = st.multiselect("Cenários (combinados)", list(PRESETS.keys()), default=list(PRESETS.keys())[:1])
+    grupos = st.multiselect("Grupos simulados", list(range(1, 9)), default=list(range(1, 9)))
+
+    if st.button("Simular"):
+      if not cenarios or not grupos:
+        st.write("Escolha ao menos um cenário e um grupo")
+      else:
+        dados = load_clusters(DATA_PATH, data_fingerprint, MODEL_PATH, model_fingerprint)
+        mudancas = [mudanca for cenario in cenarios for mudanca in PRESETS[cenario]]
+        with stage('scenario') as info:
+          matriz = run_scenario(dados, cluster_centers(pipeline), mudancas, grupos)
+          info['rows'] = int(matriz.to_numpy().sum())
+
+        total = int(matriz.to_numpy().sum())
+        movidos = total - int(np.trace(matriz.to_numpy()))
+        st.write(f"{movidos} de {total} clientes mudariam de grupo (linhas: grupo atual; colunas: grupo após o cenário)")
+        st.dataframe(matriz.loc[[f"grupo {grupo}" for grupo in sorted(grupos)]])
+
+
+elif menu == "Administração: desempenho":
+    st.subheader("Administração: desempenho")
+    st.write("Tempo, linhas e variação de memória de cada etapa desde que este processo iniciou. As etapas em cache só aparecem depois da primeira execução.")
+
+    etapas = snapshot()
+    if etapas:
+      tabela = pd.DataFrame([{
+          'etapa': nome,
+          'execuções': dados['calls'],
+          'tempo total (s)': dados['seconds_total'],
+          'linhas totais': dados['rows_total'],
+          'último tempo (s)': dados['last']['seconds'],
+          'últimas linhas': dados['last']['rows'],
+          'variação de memória (MB)': None if dados['last']['memory_delta_bytes'] is None else dados['last']['memory_delta_bytes'] / 2 ** 20,
+          'pico tracemalloc (MB)': dados['last'].get('traced_peak_bytes', float('nan')) / 2 ** 20
+          } for nome, dados in etapas.items()])
+      st.dataframe(tabela)
+    else:
+      st.write("Nenhuma etapa registrada ainda.")
+
+    texto = prometheus_text()
+    st.code(texto, language="text")
+    st.download_button("Exportar métricas (Prometheus)", data=texto, file_name="metrics.prom", mime="text/plain")
+
+    if PROFILE:
+      for nome, dados in etapas.items():
+        with st.expander(f"cProfile: {nome}"):
+          st.code(dados['last'].get('profile', ''), language="text")
+    else:
+      st.caption("Defina SEGMENTATION_PROFILE=1 para capturar cProfile e tracemalloc de cada etapa.")
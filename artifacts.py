@@ -0,0 +1,24 @@
+import hashlib
+import os
+
+
+def file_fingerprint(path):
+  # Barato o bastante para ser calculado a cada rerun do Streamlit
+  stat = os.stat(path)
+  return stat.st_mtime_ns, stat.st_size
+
+
+def artifact_path(model_path, name, *fingerprints, ext='npz'):
+  # Arquivos derivados ficam ao lado do modelo e levam no nome a versão dos dados/modelo
+  key = hashlib.sha1(repr(fingerprints).encode()).hexdigest()[:12]
+  base, _ = os.path.splitext(model_path)
+  return f"{base}.{name}-{key}.{ext}"
+
+
+def file_digest(path, chunksize=1 << 20):
+  # Versão pelo conteúdo: não muda se o arquivo for só copiado ou tocado
+  digest = hashlib.sha1()
+  with open(path, 'rb') as f:
+    for block in iter(lambda: f.read(chunksize), b''):
+      digest.update(block)
+  return digest.hexdigest()
@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import treat_columns, scale_columns
+from lookup import ClusterIndex
+from model import FastScorer
+from projections import compute_projections
+
+EDUCATION_SHARE = {'Graduation': 0.50, 'PhD': 0.22, 'Master': 0.17, '2n Cycle': 0.09, 'Basic': 0.02}
+MARITAL_SHARE = {'Married': 0.39, 'Together': 0.26, 'Single': 0.21, 'Divorced': 0.10, 'Widow': 0.035, 'Alone': 0.003, 'Absurd': 0.001, 'YOLO': 0.001}
+
+# Abaixo disso o p99 seria só o máximo das execuções
+MIN_P99_SAMPLES = 100
+
+# Características da página "Busque grupos por característica"
+CHARACTERISTICS = [[1, 2, 4, 5], [1, 3, 6, 7, 8], [2, 5, 6, 8], [1, 2, 3, 4, 5, 6, 7, 8]]
+
+
+def _choice(rng, shares, n):
+  names = list(shares)
+  p = np.array(list(shares.values()))
+  return np.array(names, dtype=object)[rng.choice(len(names), size=n, p=p / p.sum())]
+
+
+def synthetic_customers(n, seed=42):
+  # Clientes sintéticos no formato do marketing_campaign.csv, com distribuições parecidas com as reais
+  rng = np.random.default_rng(seed)
+  days = pd.date_range('2012-07-30', '2014-06-29', freq='D').strftime('%d-%m-%Y').to_numpy()
+  income = np.round(rng.lognormal(10.8, 0.45, n)).clip(1730, 250000)
+  income[rng.random(n) < 0.01] = np.nan
+
+  df = pd.DataFrame({
+      'ID': rng.permutation(n * 2)[:n],
+      'Year_Birth': rng.integers(1940, 1997, n),
+      'Education': _choice(rng, EDUCATION_SHARE, n),
+      'Marital_Status': _choice(rng, MARITAL_SHARE, n),
+      'Income': income,
+      'Kidhome': rng.choice(3, n, p=[0.58, 0.40, 0.02]),
+      'Teenhome': rng.choice(3, n, p=[0.52, 0.46, 0.02]),
+      'Dt_Customer': days[rng.integers(0, len(days), n)],
+      'Recency': rng.integers(0, 100, n)
+      })
+  for col, scale in (('MntWines', 300), ('MntFruits', 26), ('MntMeatProducts', 167), ('MntFishProducts', 37), ('MntSweetProducts', 27), ('MntGoldProds', 44)):
+    df[col] = np.floor(rng.exponential(scale, n)).astype(np.int64)
+  df['NumDealsPurchases'] = rng.poisson(2.3, n)
+  df['NumWebPurchases'] = rng.poisson(4.1, n)
+  df['NumCatalogPurchases'] = rng.poisson(2.7, n)
+  df['NumStorePurchases'] = rng.poisson(5.8, n)
+  df['NumWebVisitsMonth'] = rng.poisson(5.3, n)
+  for col, p in (('AcceptedCmp3', 0.073), ('AcceptedCmp4', 0.075), ('AcceptedCmp5', 0.073), ('AcceptedCmp1', 0.064), ('AcceptedCmp2', 0.013)):
+    df[col] = (rng.random(n) < p).astype(np.int64)
+  df['Complain'] = (rng.random(n) < 0.01).astype(np.int64)
+  df['Z_CostContact'] = 3
+  df['Z_Revenue'] = 11
+  df['Response'] = (rng.random(n) < 0.15).astype(np.int64)
+  return df
+
+
+def _timeit(func, repeat):
+  times = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    func()
+    times.append(time.perf_counter() - start)
+  return np.array(times)
+
+
+def _peak_memory(func):
+  # Pico de memória alocada durante uma execução (numpy e pandas reportam ao tracemalloc)
+  tracemalloc.start()
+  try:
+    func()
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def _percentiles(times):
+  return {
+      'p50_s': float(np.percentile(times, 50)),
+      'p99_s': float(np.percentile(times, 99)) if len(times) >= MIN_P99_SAMPLES else None,
+      'max_s': float(times.max())
+      }
+
+
+def _stage(func, repeat, items):
+  # Etapas em lote: um tempo por execução, então o p99 só aparece com --repeat >= MIN_P99_SAMPLES
+  times = _timeit(func, repeat)
+  return {
+      'items': int(items),
+      **_percentiles(times),
+      'throughput_per_s': float(items / np.median(times)),
+      'peak_mb': _peak_memory(func) / 2 ** 20
+      }
+
+
+def _query_stage(query, queries, repeat):
+  # Latência de cada consulta, não só do total
+  latencies = []
+  for _ in range(repeat):
+    for q in queries:
+      start = time.perf_counter_ns()
+      query(q)
+      latencies.append(time.perf_counter_ns() - start)
+  latencies = np.array(latencies) / 1e9
+  return {
+      'items': len(queries),
+      **_percentiles(latencies),
+      'throughput_per_s': float(1 / latencies.mean()),
+      'peak_mb': _peak_memory(lambda: [query(q) for q in queries]) / 2 ** 20
+      }
+
+
+def run_suite(pipeline, n, repeat=3, seed=42, lookups=10000):
+  df = synthetic_customers(n, seed)
+  treated, ids = treat_columns(df, is_original=True)
+  scaled = scale_columns(treated)
+  labels = pipeline.predict(scaled)
+  index = ClusterIndex(ids.to_numpy(), labels)
+  rng = np.random.default_rng(seed)
+  query_ids = rng.choice(ids.to_numpy(), size=min(lookups, len(ids)))
+
+  stages = {
+      'treat_columns': _stage(lambda: treat_columns(df, is_original=True), repeat, len(df)),
+      'scale_columns': _stage(lambda: scale_columns(treated), repeat, len(treated)),
+      'predict': _stage(lambda: pipeline.predict(scaled), repeat, len(scaled)),
+      'pca': _stage(lambda: compute_projections(treated, scaled), repeat, len(treated)),
+      'index_build': _stage(lambda: ClusterIndex(ids.to_numpy(), labels), repeat, len(ids)),
+      'id_lookup_batch': _stage(lambda: index.get_many(query_ids), repeat, len(query_ids)),
+      'id_lookup': _query_stage(index.get, query_ids[:1000].tolist(), repeat),
+      'cluster_lookup': _query_stage(lambda clusters: index.members_of([c - 1 for c in clusters]), CHARACTERISTICS, repeat)
+      }
+
+  # Resumo das atribuições: se mudar entre execuções, alguma otimização mudou os clusters
+  return {
+      'rows': int(n),
+      'treated_rows': int(len(treated)),
+      'labels_sha1': hashlib.sha1(np.ascontiguousarray(labels, dtype=np.int64).tobytes()).hexdigest(),
+      'cluster_counts': np.bincount(labels, minlength=8).tolist(),
+      'stages': stages
+      }
+
+
+def bench_record(pipeline, records, repeat=5):
+  # Compara o caminho do formulário (DataFrame de uma linha) com o FastScorer, e confere os resultados
+  scorer = FastScorer(pipeline)
+
+  def pandas_path(record):
+    treated, _ = treat_columns(pd.DataFrame([record]))
+    if len(treated) == 0:
+      return None
+    return int(pipeline.predict(scale_columns(treated))[0])
+
+  for record in records:
+    assert pandas_path(record) == scorer.predict_record(record), record['ID']
+
+  sample = records[:200]
+  pandas_times = _timeit(lambda: [pandas_path(record) for record in sample], repeat) / len(sample)
+  fast_times = _timeit(lambda: [scorer.predict_record(record) for record in sample], repeat) / len(sample)
+  return {
+      'records_checked': len(records),
+      'pandas_us': float(np.median(pandas_times) * 1e6),
+      'fast_us': float(np.median(fast_times) * 1e6)
+      }
+
+
+def compare(baseline, current, tolerance=0.10):
+  # Lista as etapas que ficaram mais lentas que a tolerância e os tamanhos cujas atribuições mudaram
+  problems = []
+  old_runs = {run['rows']: run for run in baseline['runs']}
+  for run in current['runs']:
+    old = old_runs.get(run['rows'])
+    if old is None:
+      continue
+    if old['labels_sha1'] != run['labels_sha1']:
+      problems.append(f"{run['rows']} linhas: atribuições de cluster mudaram")
+    for stage, result in run['stages'].items():
+      if stage in old['stages'] and result['p50_s'] > old['stages'][stage]['p50_s'] * (1 + tolerance):
+        problems.append(f"{run['rows']} linhas: {stage} {old['stages'][stage]['p50_s']:.4g}s -> {result['p50_s']:.4g}s")
+  return problems
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Mede treat -> scale -> predict, PCA e as buscas com clientes sintéticos.")
+  parser.add_argument('--data', default='marketing_campaign.csv')
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+  parser.add_argument('--repeat', type=int, default=3, help=f"execuções por etapa; o p99 das etapas em lote só é calculado com {MIN_P99_SAMPLES} ou mais")
+  parser.add_argument('--seed', type=int, default=42)
+  parser.add_argument('--output', default=None, help="arquivo JSON com os resultados")
+  parser.add_argument('--compare', default=None, help="JSON de uma execução anterior para detectar regressões")
+  parser.add_argument('--tolerance', type=float, default=0.10)
+  parser.add_argument('--skip-record', action='store_true', help="não mede o caminho de um único cliente")
+  args = parser.parse_args()
+
+  pipeline = joblib.load(args.model)
+  result = {'model': args.model, 'seed': args.seed, 'repeat': args.repeat, 'runs': []}
+
+  if not args.skip_record:
+    records = pd.read_csv(args.data, sep='\t').dropna().to_dict('records')
+    result['record'] = bench_record(pipeline, records)
+    print(f"{result['record']['records_checked']} clientes conferidos; DataFrame: {result['record']['pandas_us']:.0f} µs/cliente, FastScorer: {result['record']['fast_us']:.1f} µs/cliente")
+
+  for n in args.sizes:
+    run = run_suite(pipeline, n, args.repeat, args.seed)
+    result['runs'].append(run)
+    for stage, stats in run['stages'].items():
+      p99 = f"p99 {stats['p99_s'] * 1e3:10.3f} ms" if stats['p99_s'] is not None else f"máx {stats['max_s'] * 1e3:10.3f} ms"
+      print(f"{n:>10} {stage:<16} p50 {stats['p50_s'] * 1e3:10.3f} ms  {p99}  {stats['throughput_per_s']:14.0f}/s  pico {stats['peak_mb']:8.1f} MB")
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(result, f, indent=2)
+
+  if args.compare:
+    with open(args.compare) as f:
+      problems = compare(json.load(f), result, args.tolerance)
+    for problem in problems:
+      print(f"REGRESSÃO: {problem}")
+    if problems:
+      raise SystemExit(1)
+
+
+if __name__ == '__main__':
+  main()
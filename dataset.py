@@ -0,0 +1,63 @@
+import numpy as np
+
+from features import WEIGHTS
+from instrumentation import stage
+from model import assign, cluster_centers
+from storage import load_treated
+
+
+class WeightedView:
+  # Features com escala, calculadas só no pedaço pedido: view[a:b] ou view[linhas] devolvem float64
+
+  def __init__(self, values, weights=WEIGHTS):
+    self.values = values
+    self.weights = np.asarray(weights, dtype=float)
+
+  def __len__(self):
+    return len(self.values)
+
+  @property
+  def shape(self):
+    return self.values.shape
+
+  def __getitem__(self, key):
+    return self.values[key] * self.weights
+
+  def to_numpy(self):
+    # Matriz inteira; só para quem precisa dela de uma vez (ex.: PCA)
+    with stage('scale_columns', rows=len(self.values)):
+      return self.values * self.weights
+
+
+class ClusteredData:
+  # Base clusterizada guardada uma vez: features tratadas em int8 (memmap), IDs e os dois vetores de clusters
+  # "antes" é a clusterização das features sem escala, "depois" com a escala do modelo
+
+  def __init__(self, features, ids, treated_labels, original_labels):
+    self.features = features
+    self.ids = ids
+    self.treated_labels = treated_labels
+    self.original_labels = original_labels
+
+  def __len__(self):
+    return len(self.features)
+
+  @property
+  def scaled(self):
+    return WeightedView(self.features)
+
+
+def load_clustered(store_dir, pipeline):
+  with stage('store_load') as info:
+    treated, ids = load_treated(store_dir)
+    features = treated.to_numpy()
+    info['rows'] = len(features)
+
+  centers = cluster_centers(pipeline)
+  # int8 basta para 8 clusters e ocupa 1 byte por cliente
+  with stage('predict_antes', rows=len(features)):
+    treated_labels = assign(features, centers).astype(np.int8)
+  # A escala é aplicada bloco a bloco dentro do assign, então entra no tempo do predict_depois
+  with stage('predict_depois', rows=len(features)):
+    original_labels = assign(WeightedView(features), centers).astype(np.int8)
+  return ClusteredData(features, ids.to_numpy(), treated_labels, original_labels)
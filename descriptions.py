@@ -0,0 +1,9 @@
+descricao_clusters = {
+            1: "Grupo 1: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e têm comprado recentemente.  Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: é um grupo de clientes já fiel, que tem feito compras recentes. A oferta de cupons de desconto e veiculação de campanhas promocionais para esse grupo de clientes deve gerar bons resultados. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
+            2: "Grupo 2: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e faz bastante tempo que não têm comprado na loja.  Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: por ser um grupo que está há muito sem comprar na loja, mas prioriza a compras com descontos, a oferta de cupons de desconto pode ser atrativa. Campanhas promocionais geram poucos resultados nesse grupo. Programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
+            3: "Grupo 3: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar um valor de médio a alto por integrante familiar e reservam valor médio a pequeno da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de venda: é um grupo de alta renda, que, apesar de gastar bastante por integrante familiar, as compras não comprometemsignificativamente a renda familiar. Há margem para expansão das vendas com a realização de campanhas promocionais. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Consomem bebidas alcoolicas, mas não itens infantis.",
+            4: "Grupo 4: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: Campanhas promocionais geram poucos resultados nesse grupo, mas a oferta de cupons de desconto pode ser atrativa. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
+            5: "Grupo 5: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias médias, com crianças, constumam gastar pouco por integrante familiar e reservam pouco da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Não respondem bem a campanhas promocionais, preferem fazer compras quando há algum tipo de desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: Campanhas promocionais geram poucos resultados nesse grupo, mas a oferta de cupons de desconto pode ser atrativa. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas.",
+            6: "Grupo 6: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem bem a campanhas promocionais. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Itens infantis e bebidas alcoolicas com desconto podem ser ofertadas. Consomem bebidas alcoolicas, mas não itens infantis.",
+            7: "Grupo 7: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem muito bem a campanhas promocionais, costumam comprar sem desconto e têm comprado recentemente. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem muito bem a campanhas promocionais, comprando em quase todas elas. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Consomem bebidas alcoolicas, mas não itens infantis.",
+            8: "Grupo 8: Grupo de pessoas com idades e níveis de escolaridade variados. São de famílias pequenas, sem crianças, constumam gastar muito por integrante familiar e reservam um valor médio da renda familiar para compras em nossa loja. Compram tanto no site, quanto na loja física e pelo catálogo. Respondem bem a campanhas promocionais, costumam comprar sem desconto e faz bastante tempo que não têm comprado na loja. Têm o costume de comprar bebidas alcoolicas. \n Estratégias de vendas: é um grupo de renda alta, que já gasta bastante por integrante familiar e reserva valor médio da renda familiar para compras na loja. Não há tanta margem para mais vendas, mas respondem muito bem a campanhas promocionais, comprando em quase todas elas. A oferta de cupons de desconto não é necessária, já que este grupo costuma comprar mesmo sem desconto. Estão sem comprar na loja há um tempo, então programas de fidelidade os incentivarão a voltar a comprar. Consomem bebidas alcoolicas, mas não itens infantis."}
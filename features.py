@@ -0,0 +1,277 @@
+from bisect import bisect_right
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Features esperadas pelo modelo, na ordem do kmeans_pipeline.pkl
+FEATURES = ['Year_Birth', 'Education', 'Complain', 'Buys_on_campaign', 'Purchases_with_descount', 'Preference', 'Is_client_since', 'Is_buying', 'Family_size', 'Is_kids', 'Amount_spent_per_person', 'Spent_vs_income', 'Drinks']
+
+# Features com escala maior no modelo
+SCALE_WEIGHTS = {
+    'Is_buying' : 5,
+    'Is_kids' : 5,
+    'Drinks' : 5
+    }
+WEIGHTS = np.array([SCALE_WEIGHTS.get(col, 1) for col in FEATURES])
+
+CAMPAIGNS = ['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'Response']
+PRODUCTS = ['MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']
+
+EDUCATION = {
+    'Basic' : 0,
+    '2n Cycle' : 1,
+    'Graduation' : 2,
+    'Master' : 3,
+    'PhD' : 4
+    }
+
+NUM_ADULTS = {
+    'Married' : 2,
+    'Together' : 2,
+    'Single' : 1,
+    'Divorced' : 1,
+    'Widow' : 1,
+    'Alone' : 1,
+    'Absurd' : 1,
+    'YOLO' : 1
+    }
+
+# Limites dos intervalos [a, b) de cada feature discretizada
+BINS = {
+    'Purchases_with_descount' : np.array([0, 20, 40, 60, 80]),
+    'Is_client_since' : np.array([0, 275, 550, 825, 1100]),
+    'Is_buying' : np.array([0, 25, 50, 75, 100]),
+    'Amount_spent_per_person' : np.array([0, 175, 350, 525, 700]),
+    'Spent_vs_income' : np.array([0, 1, 2, 3, 4]),
+    'Year_Birth' : np.array([1900, 1925, 1950, 1975, 2000])
+    }
+
+
+def _values(df, col):
+  # Sempre em 64 bits: colunas guardadas em dtypes estreitos (int8/int16) transbordariam nas somas
+  values = df[col].to_numpy()
+  if values.dtype.kind in 'iub':
+    return values.astype(np.int64, copy=False)
+  if values.dtype.kind == 'f':
+    return values.astype(np.float64, copy=False)
+  return values
+
+
+def _column(df, col, keep):
+  return _values(df, col)[keep]
+
+
+def _sum(df, cols, keep):
+  total = _column(df, cols[0], keep)
+  for col in cols[1:]:
+    total = total + _column(df, col, keep)
+  return total
+
+
+def _clip(values, lower=None, upper=None):
+  return np.clip(np.asarray(values, dtype=float), lower, upper)
+
+
+def _bin(values, name):
+  # Equivalente a pd.cut(..., right=False) seguido do mapeamento rótulo -> código
+  edges = BINS[name]
+  values = np.asarray(values, dtype=float)
+  if not ((values >= edges[0]) & (values < edges[-1])).all():
+    raise ValueError(f"{name} possui valores fora dos intervalos {edges.tolist()}")
+  return np.searchsorted(edges[1:-1], values, side='right')
+
+
+def _map(df, col, mapping, keep):
+  values = df[col].to_numpy()[keep]
+  codes = pd.Series(values).map(mapping)
+  if codes.isna().any():
+    raise ValueError(f"{col} possui valores desconhecidos: {sorted(set(values[codes.isna().to_numpy()]))}")
+  return codes.to_numpy(dtype=np.int64)
+
+
+def _parse_dates(values):
+  # Poucas datas distintas se repetem em muitas linhas: converte cada uma só uma vez
+  codes, uniques = pd.factorize(values)
+  parsed = pd.to_datetime(pd.Series(uniques), format='%d-%m-%Y').to_numpy()
+  if len(parsed) == 0:
+    return np.full(len(values), np.datetime64('NaT'), dtype=parsed.dtype)
+  dates = parsed[codes]
+  dates[codes == -1] = np.datetime64('NaT')
+  return dates
+
+
+def _purchase_mask(df, is_original):
+  if is_original:
+    keep = df.notna().all(axis=1).to_numpy()
+  else:
+    keep = np.ones(len(df), dtype=bool)
+
+  # Only clients that bought something, and not only with discount
+  num_purchases = _values(df, 'NumCatalogPurchases') + _values(df, 'NumStorePurchases') + _values(df, 'NumWebPurchases')
+  keep &= (num_purchases != 0) & (_values(df, 'NumDealsPurchases') < num_purchases)
+  return keep
+
+
+def _latest(dates):
+  # Como o .max() do pandas: ignora datas ausentes (o max do NumPy devolveria NaT)
+  dates = dates[~np.isnat(dates)]
+  return dates.max() if len(dates) else np.datetime64('NaT')
+
+
+def reference_date(df, is_original=False):
+  # Data usada como "hoje" por treat_columns: a primeira compra mais recente entre os clientes válidos
+  return _latest(_parse_dates(_column(df, 'Dt_Customer', _purchase_mask(df, is_original))))
+
+
+def treat_columns(df, is_original=False, today=None):
+  keep = _purchase_mask(df, is_original)
+
+  # How long is client (today is taken before the income filter)
+  dt_customer = _parse_dates(_column(df, 'Dt_Customer', keep))
+  if today is None:
+    today = _latest(dt_customer)
+  else:
+    today = np.datetime64(pd.Timestamp(today), 'ns')
+
+  income_kept = _column(df, 'Income', keep) <= 200000
+  keep[keep] = income_kept
+  dt_customer = dt_customer[income_kept]
+  if np.isnat(dt_customer).any():
+    raise ValueError("Dt_Customer possui datas ausentes")
+
+  catalog = _column(df, 'NumCatalogPurchases', keep)
+  store = _column(df, 'NumStorePurchases', keep)
+  web = _column(df, 'NumWebPurchases', keep)
+  num_purchases = catalog + store + web
+  columns = {}
+
+  # Age from clients
+  columns['Year_Birth'] = _bin(_clip(_column(df, 'Year_Birth', keep), 1900, 2000), 'Year_Birth')
+  columns['Education'] = _map(df, 'Education', EDUCATION, keep)
+  columns['Complain'] = _column(df, 'Complain', keep)
+
+  # If buys on campaign
+  columns['Buys_on_campaign'] = _sum(df, CAMPAIGNS, keep)
+
+  # Buys with discount
+  with_discount = _column(df, 'NumDealsPurchases', keep) / num_purchases * 100
+  columns['Purchases_with_descount'] = _bin(_clip(with_discount, 0.1, 79), 'Purchases_with_descount')
+
+  # Buys where (ties go to the first channel, as in idxmax)
+  columns['Preference'] = np.argmax(np.column_stack([catalog, store, web]), axis=1)
+
+  days = (today - dt_customer) // np.timedelta64(1, 'D')
+  columns['Is_client_since'] = _bin(_clip(days, 0.1, 1099.99), 'Is_client_since')
+
+  # Is the client recently buying or not
+  columns['Is_buying'] = _bin(_clip(_column(df, 'Recency', keep), 0.1, 99.99), 'Is_buying')
+
+  # Family size
+  num_kids = _column(df, 'Kidhome', keep) + _column(df, 'Teenhome', keep)
+  family_size = _map(df, 'Marital_Status', NUM_ADULTS, keep) + num_kids
+  columns['Family_size'] = family_size
+
+  # Have kids or not
+  columns['Is_kids'] = (num_kids != 0).astype(np.int64)
+
+  # Amount spent per person
+  amount_spent = _sum(df, PRODUCTS, keep)
+  columns['Amount_spent_per_person'] = _bin(_clip(amount_spent / family_size, upper=699.99), 'Amount_spent_per_person')
+
+  # Amount spent vs Income
+  with np.errstate(divide='ignore', invalid='ignore'):
+    spent_vs_income = amount_spent * 100 / _column(df, 'Income', keep)
+  columns['Spent_vs_income'] = _bin(_clip(spent_vs_income, upper=3.99), 'Spent_vs_income')
+
+  # Drinks or not
+  columns['Drinks'] = (_column(df, 'MntWines', keep) != 0).astype(np.int64)
+
+  # Colunas usadas sem discretização (Complain, campanhas) ainda podem ter NaN; o cast para int64 os esconderia
+  for col in FEATURES:
+    values = np.asarray(columns[col])
+    if values.dtype.kind == 'f' and not np.isfinite(values).all():
+      raise ValueError(f"{col} possui valores ausentes ou inválidos")
+
+  index = df.index[keep]
+  treated = pd.DataFrame({col: np.asarray(columns[col], dtype=np.int64) for col in FEATURES}, index=index)
+  ids = df['ID'][keep]
+
+  return treated, ids
+
+
+def scale_columns(df1):
+  # Uma única multiplicação pelo vetor de pesos, no mesmo dtype das features
+  values = df1.to_numpy()
+  weights = np.array([SCALE_WEIGHTS.get(col, 1) for col in df1.columns], dtype=values.dtype)
+  return pd.DataFrame(values * weights, index=df1.index, columns=df1.columns, copy=False)
+
+
+_BIN_EDGES = {name: edges.tolist() for name, edges in BINS.items()}
+
+
+def _bin_value(value, name):
+  edges = _BIN_EDGES[name]
+  if not edges[0] <= value < edges[-1]:
+    raise ValueError(f"{name} possui valores fora dos intervalos {edges}")
+  return bisect_right(edges, value, 1, len(edges) - 1) - 1
+
+
+def _clip_value(value, lower=None, upper=None):
+  value = float(value)
+  if lower is not None and value < lower:
+    value = lower
+  if upper is not None and value > upper:
+    value = upper
+  return value
+
+
+def _divide(a, b):
+  # Mesmo resultado da divisão do numpy (inf/nan) em vez de ZeroDivisionError
+  if b == 0:
+    return float('nan') if a == 0 else float('inf') if a > 0 else float('-inf')
+  return a / b
+
+
+def treat_record(record, today=None):
+  # Versão escalar de treat_columns para um único cliente (dict com as colunas do marketing_campaign.csv)
+  # Retorna os valores das FEATURES, ou None se o cliente seria descartado pelos filtros
+  catalog = record['NumCatalogPurchases']
+  store = record['NumStorePurchases']
+  web = record['NumWebPurchases']
+  num_purchases = catalog + store + web
+  income = float(record['Income'])
+  if num_purchases == 0 or not record['NumDealsPurchases'] < num_purchases or not income <= 200000:
+    return None
+
+  education = EDUCATION.get(record['Education'])
+  num_adults = NUM_ADULTS.get(record['Marital_Status'])
+  if education is None:
+    raise ValueError(f"Education possui valores desconhecidos: {[record['Education']]}")
+  if num_adults is None:
+    raise ValueError(f"Marital_Status possui valores desconhecidos: {[record['Marital_Status']]}")
+
+  # Sem "today" explícito, a própria data do cliente é a mais recente
+  dt_customer = datetime.strptime(record['Dt_Customer'], '%d-%m-%Y')
+  days = 0 if today is None else (pd.Timestamp(today).to_pydatetime() - dt_customer).days
+
+  num_kids = record['Kidhome'] + record['Teenhome']
+  family_size = num_adults + num_kids
+  amount_spent = sum(record[col] for col in PRODUCTS)
+  channels = [catalog, store, web]
+
+  return (
+      _bin_value(_clip_value(record['Year_Birth'], 1900, 2000), 'Year_Birth'),
+      education,
+      int(record['Complain']),
+      int(sum(record[col] for col in CAMPAIGNS)),
+      _bin_value(_clip_value(record['NumDealsPurchases'] / num_purchases * 100, 0.1, 79), 'Purchases_with_descount'),
+      channels.index(max(channels)),
+      _bin_value(_clip_value(days, 0.1, 1099.99), 'Is_client_since'),
+      _bin_value(_clip_value(record['Recency'], 0.1, 99.99), 'Is_buying'),
+      int(family_size),
+      0 if num_kids == 0 else 1,
+      _bin_value(_clip_value(_divide(amount_spent, family_size), upper=699.99), 'Amount_spent_per_person'),
+      _bin_value(_clip_value(_divide(amount_spent * 100, income), upper=3.99), 'Spent_vs_income'),
+      0 if record['MntWines'] == 0 else 1
+      )
@@ -0,0 +1,122 @@
+import argparse
+import csv
+import sqlite3
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifacts import file_digest
+from features import treat_columns, scale_columns
+from scoring import CHUNKSIZE, read_chunks, find_reference_date
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS customers (id INTEGER PRIMARY KEY, row_hash INTEGER NOT NULL, cluster INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+'''
+
+
+def open_store(path):
+  conn = sqlite3.connect(path)
+  conn.executescript(SCHEMA)
+  return conn
+
+
+def _get_meta(conn, key):
+  row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+  return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+  conn.execute('INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, value))
+
+
+def row_hashes(chunk):
+  # Números viram float64 para o hash não depender do dtype que o read_csv inferiu em cada bloco
+  normalized = chunk.apply(lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col) else col.astype(str))
+  return pd.util.hash_pandas_object(normalized, index=False).to_numpy().view(np.int64)
+
+
+def _stored(conn, ids, hashes):
+  conn.execute('CREATE TEMP TABLE IF NOT EXISTS chunk (pos INTEGER PRIMARY KEY, id INTEGER, row_hash INTEGER)')
+  conn.execute('DELETE FROM chunk')
+  conn.executemany('INSERT INTO chunk VALUES (?, ?, ?)', zip(range(len(ids)), ids.tolist(), hashes.tolist()))
+  rows = conn.execute('SELECT chunk.pos, customers.row_hash, customers.cluster FROM chunk LEFT JOIN customers ON customers.id = chunk.id ORDER BY chunk.pos').fetchall()
+  old_hashes = np.array([r[1] if r[1] is not None else 0 for r in rows], dtype=np.int64)
+  old_clusters = np.array([r[2] if r[2] is not None else -2 for r in rows], dtype=np.int64)
+  return old_hashes, old_clusters
+
+
+def rescore(input_path, store_path, delta_path, model_path='kmeans_pipeline.pkl', chunksize=CHUNKSIZE, today=None):
+  # Reclusteriza só os clientes novos ou alterados desde a última execução
+  # cluster -1: cliente descartado pelos filtros de treat_columns; -2 (só no delta): cliente novo
+  # -3 (só no delta): cliente que não está mais no arquivo, removido do store
+  conn = open_store(store_path)
+  pipeline = joblib.load(model_path)
+  model_version = file_digest(model_path)
+
+  # O "today" fica fixo no store: mudá-lo (ou mudar o modelo) obriga a reclusterizar todos os clientes
+  stored_today = _get_meta(conn, 'today')
+  if today is None:
+    today = stored_today if stored_today is not None else find_reference_date(input_path, chunksize)
+  today = str(pd.Timestamp(today).date())
+  if today != stored_today or model_version != _get_meta(conn, 'model'):
+    # Os clusters antigos ficam guardados para o delta mostrar as mudanças; só os hashes são zerados
+    conn.execute('UPDATE customers SET row_hash = 0')
+    _set_meta(conn, 'today', today)
+    _set_meta(conn, 'model', model_version)
+
+  # IDs lidos nesta execução, para achar os que sumiram do arquivo
+  conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY)')
+  conn.execute('DELETE FROM seen')
+
+  total = rescored = moved = 0
+  with open(delta_path, 'w', newline='') as output:
+    writer = csv.writer(output)
+    writer.writerow(['ID', 'old_cluster', 'new_cluster'])
+    for chunk in read_chunks(input_path, chunksize):
+      ids = chunk['ID'].to_numpy(dtype=np.int64)
+      hashes = row_hashes(chunk)
+      conn.executemany('INSERT OR IGNORE INTO seen VALUES (?)', zip(ids.tolist()))
+      old_hashes, old_clusters = _stored(conn, ids, hashes)
+      changed = (old_clusters == -2) | (old_hashes != hashes)
+      total += len(chunk)
+      if not changed.any():
+        continue
+
+      new_clusters = np.full(int(changed.sum()), -1, dtype=np.int64)
+      treated, _ = treat_columns(chunk[changed].reset_index(drop=True), is_original=True, today=today)
+      if len(treated):
+        new_clusters[treated.index.to_numpy()] = pipeline.predict(scale_columns(treated))
+
+      conn.executemany('INSERT INTO customers (id, row_hash, cluster) VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET row_hash = excluded.row_hash, cluster = excluded.cluster', zip(ids[changed].tolist(), hashes[changed].tolist(), new_clusters.tolist()))
+      moves = old_clusters[changed] != new_clusters
+      writer.writerows(zip(ids[changed][moves].tolist(), old_clusters[changed][moves].tolist(), new_clusters[moves].tolist()))
+      rescored += int(changed.sum())
+      moved += int(moves.sum())
+
+    removed = conn.execute('SELECT id, cluster FROM customers WHERE id NOT IN (SELECT id FROM seen) ORDER BY id').fetchall()
+    writer.writerows((id_cliente, cluster, -3) for id_cliente, cluster in removed)
+    conn.execute('DELETE FROM customers WHERE id NOT IN (SELECT id FROM seen)')
+
+  conn.commit()
+  conn.close()
+  return total, rescored, moved, len(removed)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Reclusteriza apenas clientes novos ou alterados e gera o delta de mudanças de cluster.")
+  parser.add_argument('input', help="arquivo separado por tabulação")
+  parser.add_argument('--store', default='clusters.sqlite', help="banco SQLite com o hash e o cluster de cada ID")
+  parser.add_argument('--delta', default='delta.csv', help="CSV de saída com as colunas ID,old_cluster,new_cluster (new_cluster -3: cliente removido)")
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+  parser.add_argument('--today', default=None, help="data de referência (YYYY-MM-DD); por padrão, a guardada no store")
+  args = parser.parse_args()
+
+  total, rescored, moved, removed = rescore(args.input, args.store, args.delta, args.model, args.chunksize, args.today)
+  print(f"{total} clientes lidos, {rescored} reclusterizados, {moved} mudaram de cluster, {removed} removidos")
+
+
+if __name__ == '__main__':
+  main()
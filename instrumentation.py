@@ -0,0 +1,104 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Com SEGMENTATION_PROFILE=1 cada etapa também roda com cProfile e tracemalloc
+PROFILE = os.environ.get('SEGMENTATION_PROFILE', '') not in ('', '0')
+
+_lock = threading.Lock()
+_stages = {}
+# Só um cProfile pode estar ativo por vez: etapas aninhadas ou em outras threads não são perfiladas
+_profiling = threading.Lock()
+
+
+def _rss():
+  # Memória residente do processo; None fora do Linux
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError):
+    return None
+
+
+@contextmanager
+def stage(name, rows=None):
+  # Mede tempo, linhas e variação de memória de uma etapa; rows pode ser atualizado dentro do bloco
+  info = {'rows': rows}
+  profiler = None
+  if PROFILE and _profiling.acquire(blocking=False):
+    if not tracemalloc.is_tracing():
+      tracemalloc.start()
+    tracemalloc.reset_peak()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+  rss_before = _rss()
+  start = time.perf_counter()
+  try:
+    yield info
+  finally:
+    elapsed = time.perf_counter() - start
+    rss_after = _rss()
+    record = {
+        'seconds': elapsed,
+        'rows': info['rows'],
+        'memory_delta_bytes': None if rss_before is None or rss_after is None else rss_after - rss_before
+        }
+    if profiler is not None:
+      profiler.disable()
+      _profiling.release()
+      traced_after, traced_peak = tracemalloc.get_traced_memory()
+      record['traced_delta_bytes'] = traced_after - traced_before
+      record['traced_peak_bytes'] = traced_peak - traced_before
+      out = io.StringIO()
+      pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+      record['profile'] = out.getvalue()
+    _record(name, record)
+
+
+def _record(name, record):
+  with _lock:
+    stats = _stages.setdefault(name, {'calls': 0, 'seconds_total': 0.0, 'rows_total': 0})
+    stats['calls'] += 1
+    stats['seconds_total'] += record['seconds']
+    stats['rows_total'] += record['rows'] or 0
+    stats['last'] = record
+
+
+def snapshot():
+  with _lock:
+    return {name: dict(stats, last=dict(stats['last'])) for name, stats in _stages.items()}
+
+
+def reset():
+  with _lock:
+    _stages.clear()
+
+
+def prometheus_text(prefix='segmentation'):
+  metrics = [
+      ('stage_calls_total', 'counter', 'Execuções de cada etapa', lambda s: s['calls']),
+      ('stage_seconds_total', 'counter', 'Tempo total em cada etapa', lambda s: s['seconds_total']),
+      ('stage_rows_total', 'counter', 'Linhas processadas em cada etapa', lambda s: s['rows_total']),
+      ('stage_last_seconds', 'gauge', 'Tempo da última execução da etapa', lambda s: s['last']['seconds']),
+      ('stage_last_rows', 'gauge', 'Linhas da última execução da etapa', lambda s: s['last']['rows']),
+      ('stage_last_memory_delta_bytes', 'gauge', 'Variação da memória residente na última execução', lambda s: s['last']['memory_delta_bytes']),
+      ('stage_last_traced_peak_bytes', 'gauge', 'Pico de memória alocada na última execução (tracemalloc)', lambda s: s['last'].get('traced_peak_bytes'))
+      ]
+  stages = snapshot()
+  lines = []
+  for name, kind, help_text, value in metrics:
+    samples = [(stage_name, value(stats)) for stage_name, stats in sorted(stages.items())]
+    samples = [(stage_name, v) for stage_name, v in samples if v is not None]
+    if not samples:
+      continue
+    lines.append(f"# HELP {prefix}_{name} {help_text}")
+    lines.append(f"# TYPE {prefix}_{name} {kind}")
+    lines.extend(f'{prefix}_{name}{{stage="{stage_name}"}} {v}' for stage_name, v in samples)
+  return '\n'.join(lines) + '\n'
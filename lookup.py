@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class ClusterIndex:
+  # Índice ID -> cluster em arrays ordenados: cada busca é um searchsorted, sem varrer a tabela
+
+  def __init__(self, ids, clusters):
+    ids = np.asarray(ids)
+    clusters = np.asarray(clusters)
+    order = np.argsort(ids, kind='stable')
+    self.ids = ids[order]
+    self.clusters = clusters[order]
+
+    # IDs ordenados de cada cluster, como fatias de um único array
+    by_cluster = np.argsort(self.clusters, kind='stable')
+    self._member_ids = self.ids[by_cluster]
+    values, starts = np.unique(self.clusters[by_cluster], return_index=True)
+    ends = np.append(starts[1:], len(by_cluster))
+    self._members = {int(c): self._member_ids[start:end] for c, start, end in zip(values, starts, ends)}
+
+  def __len__(self):
+    return len(self.ids)
+
+  def get_many(self, ids, missing=-1):
+    ids = np.asarray(ids)
+    pos = np.searchsorted(self.ids, ids)
+    pos_valid = np.minimum(pos, len(self.ids) - 1)
+    found = (pos < len(self.ids)) & (self.ids[pos_valid] == ids) if len(self.ids) else np.zeros(ids.shape, dtype=bool)
+    result = np.full(ids.shape, missing, dtype=np.int64)
+    result[found] = self.clusters[pos_valid[found]]
+    return result
+
+  def get(self, id_cliente):
+    pos = np.searchsorted(self.ids, id_cliente)
+    if pos < len(self.ids) and self.ids[pos] == id_cliente:
+      return int(self.clusters[pos])
+    return None
+
+  def members(self, cluster):
+    return self._members.get(int(cluster), self.ids[:0])
+
+  def members_of(self, clusters):
+    # Intercala as listas já ordenadas de cada cluster
+    clusters = sorted(set(int(c) for c in clusters))
+    if set(clusters) >= set(self._members):
+      return self.ids
+    parts = [self.members(c) for c in clusters]
+    if not parts:
+      return self.ids[:0]
+    if len(parts) == 1:
+      return parts[0]
+    return np.sort(np.concatenate(parts), kind='stable')
+
+
+def paginate(ids, page, page_size):
+  start = (page - 1) * page_size
+  return ids[start:start + page_size]
+
+
+def export_csv(ids, output, chunksize=100000):
+  output.write('ID\n')
+  for start in range(0, len(ids), chunksize):
+    output.write('\n'.join(map(str, ids[start:start + chunksize].tolist())) + '\n')
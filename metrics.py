@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifacts import artifact_path, file_fingerprint
+from features import treat_columns, scale_columns
+
+CHUNKSIZE = 2048
+
+# Até esse tamanho o silhouette exato (O(n²) em tempo) ainda é rápido; acima disso usa amostra
+EXACT_LIMIT = 20000
+
+
+def _chunks(n, chunksize):
+  for start in range(0, n, chunksize):
+    yield slice(start, min(start + chunksize, n))
+
+
+def _distances(a, b, b_sq):
+  # Distância euclidiana como no pairwise_distances do sklearn
+  d = (a ** 2).sum(axis=1)[:, None] - 2 * a @ b.T + b_sq[None, :]
+  return np.sqrt(np.maximum(d, 0))
+
+
+def davies_bouldin(X, labels, chunksize=100000):
+  # Duas passadas em blocos (médias, depois dispersão) e o resto só sobre os k centroides
+  labels = np.asarray(labels)
+  clusters, labels = np.unique(labels, return_inverse=True)
+  k = len(clusters)
+
+  sums = np.zeros((k, X.shape[1]))
+  counts = np.bincount(labels, minlength=k)
+  for block in _chunks(len(X), chunksize):
+    np.add.at(sums, labels[block], np.asarray(X[block], dtype=float))
+  centroids = sums / counts[:, None]
+
+  spread = np.zeros(k)
+  for block in _chunks(len(X), chunksize):
+    x = np.asarray(X[block], dtype=float)
+    np.add.at(spread, labels[block], np.linalg.norm(x - centroids[labels[block]], axis=1))
+  spread /= counts
+
+  separation = np.linalg.norm(centroids[:, None, :] - centroids[None, :, :], axis=2)
+  if k < 2 or np.allclose(spread, 0) or np.allclose(separation, 0):
+    return 0.0
+  separation[separation == 0] = np.inf
+  ratio = (spread[:, None] + spread[None, :]) / separation
+  return float(ratio.max(axis=1).mean())
+
+
+def _silhouette_rows(X, labels, rows, X_sq, counts, chunksize):
+  # Silhouette de cada linha em "rows" contra a base inteira, somando distâncias por cluster em blocos
+  k = len(counts)
+  sums = np.zeros((len(rows), k))
+  x_rows = np.asarray(X[rows], dtype=float)
+  onehot = np.eye(k)
+  for block in _chunks(len(X), chunksize):
+    d = _distances(x_rows, np.asarray(X[block], dtype=float), X_sq[block])
+    # Soma das distâncias por cluster em uma única multiplicação
+    sums += d @ onehot[labels[block]]
+
+  own = labels[rows]
+  own_counts = counts[own]
+  a = sums[np.arange(len(rows)), own] / np.maximum(own_counts - 1, 1)
+  others = sums / counts[None, :]
+  others[np.arange(len(rows)), own] = np.inf
+  b = others.min(axis=1)
+  s = (b - a) / np.maximum(a, b)
+  # Como no sklearn: silhouette 0 para clusters de um único ponto
+  return np.where(own_counts > 1, np.nan_to_num(s), 0.0)
+
+
+def silhouette(X, labels, sample_size=None, seed=42, chunksize=CHUNKSIZE, z=1.96):
+  # Exato em blocos (memória O(chunksize·n)); com sample_size, exato dentro de uma amostra
+  # (como o sample_size do sklearn, custo O(sample_size²))
+  # O intervalo é só o da média dentro da amostra: os pontos são medidos contra a amostra, não contra a
+  # base inteira, então ele não garante cobrir o silhouette exato da base
+  labels = np.asarray(labels)
+  sampled = sample_size is not None and sample_size < len(X)
+  if sampled:
+    rows = np.sort(np.random.default_rng(seed).choice(len(X), size=sample_size, replace=False))
+    X = np.asarray(X[rows], dtype=float)
+    labels = labels[rows]
+
+  _, labels = np.unique(labels, return_inverse=True)
+  counts = np.bincount(labels)
+  X_sq = np.concatenate([(np.asarray(X[block], dtype=float) ** 2).sum(axis=1) for block in _chunks(len(X), chunksize)])
+
+  values = np.concatenate([_silhouette_rows(X, labels, np.arange(len(X))[block], X_sq, counts, chunksize) for block in _chunks(len(X), chunksize)])
+  mean = float(values.mean())
+  if not sampled:
+    return mean, (mean, mean)
+  margin = float(z * values.std(ddof=1) / np.sqrt(len(values)))
+  return mean, (mean - margin, mean + margin)
+
+
+def cluster_quality(X, labels, sample_size=None, seed=42):
+  if sample_size is None and len(X) > EXACT_LIMIT:
+    sample_size = EXACT_LIMIT
+  score, interval = silhouette(X, labels, sample_size, seed)
+  return {
+      'silhouette': score,
+      'silhouette_sample_interval': list(interval),
+      'silhouette_exact': sample_size is None or sample_size >= len(X),
+      'davies_bouldin': davies_bouldin(X, labels),
+      'rows': int(len(X))
+      }
+
+
+def metrics_path(data_path, model_path):
+  return artifact_path(model_path, 'metrics', file_fingerprint(data_path), file_fingerprint(model_path), ext='json')
+
+
+def _matrix(X):
+  # DataFrames viram arrays sem cópia; arrays e views com escala (dataset.WeightedView) são lidos em blocos
+  return X.to_numpy() if isinstance(X, pd.DataFrame) else X
+
+
+def compute_metrics(df_antes, df_depois, treated_labels, original_labels, sample_size=None, seed=42):
+  # "antes": features sem escala; "depois": features com escala maior nas mais importantes
+  return {
+      'antes': cluster_quality(_matrix(df_antes), treated_labels, sample_size, seed),
+      'depois': cluster_quality(_matrix(df_depois), original_labels, sample_size, seed)
+      }
+
+
+def save_metrics(path, metrics):
+  tmp = path + '.tmp'
+  with open(tmp, 'w') as f:
+    json.dump(metrics, f, indent=2)
+  os.replace(tmp, path)
+
+
+def load_metrics(path):
+  with open(path) as f:
+    return json.load(f)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Calcula silhouette e Davies-Bouldin dos grupos, antes e depois da escala das features.")
+  parser.add_argument('--data', default='marketing_campaign.csv')
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--sample-size', type=int, default=None, help=f"tamanho da amostra do silhouette; por padrão exato até {EXACT_LIMIT} linhas")
+  parser.add_argument('--seed', type=int, default=42)
+  args = parser.parse_args()
+
+  pipeline = joblib.load(args.model)
+  original_treated, _ = treat_columns(pd.read_csv(args.data, sep='\t'), is_original=True)
+  original_scaled = scale_columns(original_treated)
+  metrics = compute_metrics(original_treated, original_scaled, pipeline.predict(original_treated), pipeline.predict(original_scaled), args.sample_size, args.seed)
+
+  path = metrics_path(args.data, args.model)
+  save_metrics(path, metrics)
+  print(json.dumps(metrics, indent=2))
+  print(path)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,45 @@
+from operator import mul
+
+import numpy as np
+
+from features import WEIGHTS, treat_record
+
+
+def cluster_centers(pipeline):
+  return pipeline.steps[-1][1].cluster_centers_
+
+
+def assign(X, centers, chunksize=100000):
+  # Centroide mais próximo, com a mesma fórmula do KMeans.predict: ||c||² - 2x·c
+  centers = np.asarray(centers, dtype=float)
+  centers_sq = (centers ** 2).sum(axis=1)
+  labels = np.empty(len(X), dtype=np.int32)
+  for start in range(0, len(X), chunksize):
+    x = np.asarray(X[start:start + chunksize], dtype=float)
+    labels[start:start + chunksize] = (centers_sq - 2 * x @ centers.T).argmin(axis=1)
+  return labels
+
+
+class FastScorer:
+  # Previsão de um único cliente sem pandas: features escalares + distância aos centroides
+
+  def __init__(self, pipeline):
+    centers = np.asarray(cluster_centers(pipeline), dtype=float)
+    self.centers = centers.tolist()
+    self.centers_sq = (centers ** 2).sum(axis=1).tolist()
+    self.weights = WEIGHTS.tolist()
+
+  def predict_features(self, features):
+    x = list(map(mul, features, self.weights))
+    best, best_distance = 0, None
+    for label, (center, center_sq) in enumerate(zip(self.centers, self.centers_sq)):
+      distance = center_sq - 2 * sum(map(mul, x, center))
+      if best_distance is None or distance < best_distance:
+        best, best_distance = label, distance
+    return best
+
+  def predict_record(self, record, today=None):
+    features = treat_record(record, today)
+    if features is None:
+      return None
+    return self.predict_features(features)
@@ -0,0 +1,70 @@
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+
+from artifacts import artifact_path, file_fingerprint
+from features import treat_columns, scale_columns
+
+
+def compute_projections(df_antes, df_depois):
+  pca_antes = PCA(n_components=3, random_state=42).fit_transform(df_antes)
+  pca_depois = PCA(n_components=3, random_state=42).fit_transform(df_depois)
+  return pca_antes.astype(np.float32), pca_depois.astype(np.float32)
+
+
+def projections_path(data_path, model_path):
+  return artifact_path(model_path, 'pca', file_fingerprint(data_path), file_fingerprint(model_path))
+
+
+def save_projections(path, pca_antes, pca_depois, treated_labels, original_labels):
+  tmp = path + '.tmp.npz'
+  np.savez(tmp, antes=pca_antes, depois=pca_depois, treated_labels=treated_labels.astype(np.int8), original_labels=original_labels.astype(np.int8))
+  os.replace(tmp, path)
+
+
+def load_projections(path):
+  with np.load(path) as data:
+    return data['antes'], data['depois'], data['treated_labels'], data['original_labels']
+
+
+def stratified_sample(labels, max_points, seed=42):
+  # Amostra proporcional ao tamanho de cada cluster, com ao menos um ponto por cluster
+  labels = np.asarray(labels)
+  if max_points is None or len(labels) <= max_points:
+    return np.arange(len(labels))
+
+  rng = np.random.default_rng(seed)
+  clusters, counts = np.unique(labels, return_counts=True)
+  quotas = np.maximum(1, np.floor(counts * max_points / len(labels)).astype(int))
+  chosen = [rng.choice(np.flatnonzero(labels == cluster), size=quota, replace=False) for cluster, quota in zip(clusters, quotas)]
+  return np.sort(np.concatenate(chosen))
+
+
+def build_projections(data_path, model_path, pipeline=None):
+  if pipeline is None:
+    pipeline = joblib.load(model_path)
+  original_df = pd.read_csv(data_path, sep='\t')
+  original_treated, _ = treat_columns(original_df, is_original=True)
+  original_scaled = scale_columns(original_treated)
+
+  pca_antes, pca_depois = compute_projections(original_treated, original_scaled)
+  path = projections_path(data_path, model_path)
+  save_projections(path, pca_antes, pca_depois, pipeline.predict(original_treated), pipeline.predict(original_scaled))
+  return path
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Pré-calcula as projeções PCA 3D usadas em \"Entenda os dados\".")
+  parser.add_argument('--data', default='marketing_campaign.csv')
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  args = parser.parse_args()
+
+  print(build_projections(args.data, args.model))
+
+
+if __name__ == '__main__':
+  main()
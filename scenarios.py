@@ -0,0 +1,122 @@
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset import load_clustered
+from features import FEATURES, BINS, CAMPAIGNS, WEIGHTS
+from model import assign, cluster_centers
+from storage import is_current, convert
+
+# Faixa válida de cada feature tratada; uma perturbação nunca leva um cliente para fora dela
+LIMITS = {name: (0, len(edges) - 2) for name, edges in BINS.items()}
+LIMITS.update({
+    'Education': (0, 4),
+    'Complain': (0, 1),
+    'Buys_on_campaign': (0, len(CAMPAIGNS)),
+    'Preference': (0, 2),
+    'Family_size': (1, None),
+    'Is_kids': (0, 1),
+    'Drinks': (0, 1)
+    })
+
+OPERATIONS = ('set', 'add')
+
+# Cenários prontos para a página do app: (feature, operação, valor)
+PRESETS = {
+    "Comprou nos últimos 25 dias": [('Is_buying', 'set', 0)],
+    "Aceitou mais uma campanha": [('Buys_on_campaign', 'add', 1)],
+    "Passou a comprar bebidas": [('Drinks', 'set', 1)],
+    "Comprou uma faixa a menos com desconto": [('Purchases_with_descount', 'add', -1)],
+    "Gastou uma faixa a mais por pessoa": [('Amount_spent_per_person', 'add', 1)]
+    }
+
+
+def _validate(changes):
+  for feature, op, _ in changes:
+    if feature not in LIMITS:
+      raise ValueError(f"feature desconhecida: {feature}")
+    if op not in OPERATIONS:
+      raise ValueError(f"operação desconhecida: {op} (use {', '.join(OPERATIONS)})")
+
+
+def apply_changes(x, changes):
+  # Aplica as mudanças em um bloco de features tratadas (float), no lugar
+  for feature, op, value in changes:
+    col = FEATURES.index(feature)
+    if op == 'set':
+      x[:, col] = value
+    else:
+      x[:, col] += value
+    low, high = LIMITS[feature]
+    np.clip(x[:, col], low, high, out=x[:, col])
+  return x
+
+
+def simulate(features, labels, centers, changes, clusters=None, weights=WEIGHTS, chunksize=100000):
+  # Reatribui de uma vez os clientes dos clusters escolhidos (todos, se None) após as mudanças
+  _validate(changes)
+  labels = np.asarray(labels)
+  weights = np.asarray(weights, dtype=float)
+
+  selected = np.ones(len(labels), dtype=bool) if clusters is None else np.isin(labels, clusters)
+  new_labels = labels.copy()
+  for start in range(0, len(labels), chunksize):
+    rows = start + np.flatnonzero(selected[start:start + chunksize])
+    if len(rows) == 0:
+      continue
+    x = apply_changes(np.asarray(features[rows], dtype=float), changes) * weights
+    new_labels[rows] = assign(x, centers, chunksize)
+  return new_labels, selected
+
+
+def transition_matrix(before, after, n_clusters):
+  # Linha: cluster de origem; coluna: cluster depois do cenário
+  before = np.asarray(before, dtype=np.int64)
+  after = np.asarray(after, dtype=np.int64)
+  return np.bincount(before * n_clusters + after, minlength=n_clusters * n_clusters).reshape(n_clusters, n_clusters)
+
+
+def run_scenario(data, centers, changes, groups=None):
+  # Grupos numerados de 1 a 8, como no app; devolve a matriz de transição só dos clientes simulados
+  clusters = None if groups is None else [group - 1 for group in groups]
+  new_labels, selected = simulate(data.features, data.original_labels, centers, changes, clusters)
+  n_clusters = len(centers)
+  matrix = transition_matrix(data.original_labels[selected], new_labels[selected], n_clusters)
+  names = [f"grupo {group}" for group in range(1, n_clusters + 1)]
+  return pd.DataFrame(matrix, index=pd.Index(names, name='antes'), columns=pd.Index(names, name='depois'))
+
+
+def _parse_change(op):
+  def parse(text):
+    feature, _, value = text.partition('=')
+    if not value:
+      raise argparse.ArgumentTypeError(f"esperado FEATURE=VALOR, recebido {text!r}")
+    return feature, op, int(value)
+  return parse
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Simula mudanças nas features de todos os clientes e mostra para qual grupo cada um migraria.")
+  parser.add_argument('--data', default='marketing_campaign.csv')
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--set', dest='changes', action='append', type=_parse_change('set'), default=[], metavar='FEATURE=VALOR', help="define o valor tratado da feature (ex.: Is_buying=0)")
+  parser.add_argument('--add', dest='changes', action='append', type=_parse_change('add'), default=[], metavar='FEATURE=VALOR', help="soma ao valor tratado da feature (ex.: Buys_on_campaign=1)")
+  parser.add_argument('--groups', type=int, nargs='+', default=None, help="grupos (1 a 8) simulados; por padrão todos")
+  args = parser.parse_args()
+
+  store_path = os.path.splitext(args.data)[0] + '.store'
+  if not is_current(store_path, args.data):
+    convert(args.data, store_path)
+  pipeline = joblib.load(args.model)
+  matrix = run_scenario(load_clustered(store_path, pipeline), cluster_centers(pipeline), args.changes, args.groups)
+
+  moved = int(matrix.to_numpy().sum() - np.trace(matrix.to_numpy()))
+  print(matrix.to_string())
+  print(f"{moved} de {int(matrix.to_numpy().sum())} clientes mudariam de grupo")
+
+
+if __name__ == '__main__':
+  main()
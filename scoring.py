@@ -0,0 +1,114 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from features import treat_columns, scale_columns, reference_date
+
+CHUNKSIZE = 100000
+
+# Modelo carregado uma vez por processo do pool
+_worker_pipeline = None
+
+
+def read_chunks(path, chunksize=CHUNKSIZE):
+  return pd.read_csv(path, sep='\t', chunksize=chunksize)
+
+
+def latest_date(a, b):
+  # A mais recente de duas datas, ignorando NaT
+  if np.isnat(a):
+    return b
+  if np.isnat(b):
+    return a
+  return max(a, b)
+
+
+def find_reference_date(path, chunksize=CHUNKSIZE, is_original=True):
+  # Primeira passada: o "hoje" precisa ser o mesmo para todos os blocos
+  today = np.datetime64('NaT')
+  for chunk in read_chunks(path, chunksize):
+    today = latest_date(today, reference_date(chunk, is_original=is_original))
+  return today
+
+
+def score_chunk(pipeline, chunk, today, is_original=True):
+  treated, ids = treat_columns(chunk, is_original=is_original, today=today)
+  if len(treated) == 0:
+    return pd.DataFrame({'ID': ids.to_numpy(), 'cluster': np.empty(0, dtype=np.int64)})
+
+  labels = pipeline.predict(scale_columns(treated))
+  return pd.DataFrame({'ID': ids.to_numpy(), 'cluster': labels})
+
+
+def _init_worker(model_path):
+  global _worker_pipeline
+  _worker_pipeline = joblib.load(model_path)
+  # Um processo por núcleo: evita que cada worker abra várias threads no predict
+  threadpool_limits(1)
+
+
+def _score_partition(chunk, today, is_original):
+  return score_chunk(_worker_pipeline, chunk, today, is_original)
+
+
+def _score_serial(input_path, model_path, chunksize, today, is_original):
+  pipeline = joblib.load(model_path)
+  for chunk in read_chunks(input_path, chunksize):
+    yield score_chunk(pipeline, chunk, today, is_original)
+
+
+def _score_parallel(input_path, model_path, chunksize, today, is_original, workers):
+  # Mantém poucas partições em andamento para limitar a memória, e devolve na ordem do arquivo
+  with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as executor:
+    pending = deque()
+    for chunk in read_chunks(input_path, chunksize):
+      pending.append(executor.submit(_score_partition, chunk, today, is_original))
+      if len(pending) >= 2 * workers:
+        yield pending.popleft().result()
+    while pending:
+      yield pending.popleft().result()
+
+
+def score_file(input_path, output_path, model_path='kmeans_pipeline.pkl', chunksize=CHUNKSIZE, today=None, is_original=True, workers=1):
+  if today is None:
+    today = find_reference_date(input_path, chunksize, is_original)
+
+  if workers > 1:
+    results = _score_parallel(input_path, model_path, chunksize, today, is_original, workers)
+  else:
+    results = _score_serial(input_path, model_path, chunksize, today, is_original)
+
+  rows = 0
+  with open(output_path, 'w', newline='') as output:
+    header = True
+    for result in results:
+      result.to_csv(output, index=False, header=header)
+      header = False
+      rows += len(result)
+
+  return rows
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Clusteriza clientes de um arquivo no formato do marketing_campaign.csv, em blocos.")
+  parser.add_argument('input', help="arquivo separado por tabulação")
+  parser.add_argument('output', help="arquivo CSV de saída com as colunas ID,cluster")
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+  parser.add_argument('--workers', type=int, default=1, help="número de processos; 0 usa todos os núcleos")
+  parser.add_argument('--today', default=None, help="data de referência (YYYY-MM-DD); por padrão, a maior Dt_Customer do arquivo")
+  args = parser.parse_args()
+
+  workers = args.workers or os.cpu_count()
+  rows = score_file(args.input, args.output, args.model, args.chunksize, args.today, workers=workers)
+  print(f"{rows} clientes clusterizados em {args.output}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,180 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from descriptions import descricao_clusters
+from features import treat_columns, scale_columns
+from instrumentation import stage, prometheus_text
+from scoring import find_reference_date
+
+
+class MicroBatcher:
+  # Junta os pedidos que chegam dentro de uma janela de tempo e os clusteriza de uma vez
+  # O "today" é fixo: o resultado de um cliente não pode depender de com quem ele caiu no lote
+
+  def __init__(self, pipeline, today, window=0.01, max_batch=1000):
+    self.pipeline = pipeline
+    self.today = today
+    self.window = window
+    self.max_batch = max_batch
+    self._queue = queue.Queue()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def submit(self, records):
+    future = Future()
+    self._queue.put((records, future))
+    return future
+
+  def predict(self, records):
+    labels = np.full(len(records), -1, dtype=np.int64)
+    if not records:
+      return labels
+
+    with stage('treat_columns', rows=len(records)):
+      treated, _ = treat_columns(pd.DataFrame.from_records(records), today=self.today)
+    if len(treated):
+      with stage('predict', rows=len(treated)):
+        labels[treated.index.to_numpy()] = self.pipeline.predict(scale_columns(treated))
+    return labels
+
+  def _collect(self):
+    batch = [self._queue.get()]
+    size = len(batch[0][0])
+    deadline = time.monotonic() + self.window
+    while size < self.max_batch:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        item = self._queue.get(timeout=remaining)
+      except queue.Empty:
+        break
+      batch.append(item)
+      size += len(item[0])
+    return batch
+
+  def _run(self):
+    while True:
+      batch = self._collect()
+      try:
+        labels = self.predict([record for records, _ in batch for record in records])
+      except Exception:
+        # Um registro inválido não derruba o lote: cada pedido é refeito sozinho
+        for records, future in batch:
+          try:
+            future.set_result(self.predict(records))
+          except Exception as error:
+            future.set_exception(error)
+        continue
+
+      start = 0
+      for records, future in batch:
+        future.set_result(labels[start:start + len(records)])
+        start += len(records)
+
+
+def format_results(records, labels):
+  results = []
+  for record, label in zip(records, labels):
+    if label < 0:
+      results.append({'ID': record.get('ID'), 'cluster': None, 'grupo': None, 'descricao': None})
+    else:
+      grupo = int(label) + 1
+      results.append({'ID': record.get('ID'), 'cluster': int(label), 'grupo': grupo, 'descricao': descricao_clusters.get(grupo)})
+  return results
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+  batcher = None
+
+  def _send(self, status, body, content_type='application/json; charset=utf-8'):
+    payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(body, ensure_ascii=False).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(payload)))
+    self.end_headers()
+    self.wfile.write(payload)
+
+  def do_GET(self):
+    if self.path == '/health':
+      self._send(200, {'status': 'ok'})
+    elif self.path == '/metrics':
+      self._send(200, prometheus_text(), 'text/plain; version=0.0.4; charset=utf-8')
+    else:
+      self._send(404, {'erro': 'rota não encontrada'})
+
+  def do_POST(self):
+    if self.path != '/predict':
+      self._send(404, {'erro': 'rota não encontrada'})
+      return
+
+    try:
+      body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+    except ValueError:
+      self._send(400, {'erro': 'JSON inválido'})
+      return
+
+    # Aceita um cliente, uma lista de clientes ou {"records": [...]}
+    records = body.get('records', [body]) if isinstance(body, dict) else body
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+      self._send(400, {'erro': 'esperado um cliente ou uma lista de clientes'})
+      return
+
+    try:
+      labels = self.batcher.submit(records).result()
+    except (KeyError, ValueError, TypeError) as error:
+      # Campo ausente, valor inválido ou de tipo errado: erro do cliente
+      self._send(422, {'erro': str(error)})
+      return
+    except Exception as error:
+      self._send(500, {'erro': str(error)})
+      return
+
+    self._send(200, {'results': format_results(records, labels)})
+
+  def log_message(self, format, *args):
+    pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+  daemon_threads = True
+  # Muitos clientes conectando ao mesmo tempo é justamente o caso do micro-batching
+  request_queue_size = 1024
+
+
+def make_server(pipeline, today, host='127.0.0.1', port=8000, window=0.01, max_batch=1000):
+  handler = type('Handler', (ScoringHandler,), {'batcher': MicroBatcher(pipeline, today, window, max_batch)})
+  return ScoringServer((host, port), handler)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Serviço HTTP local de clusterização de clientes (POST /predict, GET /metrics).")
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=8000)
+  parser.add_argument('--model', default='kmeans_pipeline.pkl')
+  parser.add_argument('--data', default='marketing_campaign.csv', help="base usada para definir a data de referência, se --today não for informado")
+  parser.add_argument('--today', default=None, help="data de referência (YYYY-MM-DD) para Is_client_since")
+  parser.add_argument('--window-ms', type=float, default=10, help="janela de espera para formar um lote")
+  parser.add_argument('--max-batch', type=int, default=1000)
+  args = parser.parse_args()
+
+  today = args.today
+  if today is None:
+    today = find_reference_date(args.data)
+
+  server = make_server(joblib.load(args.model), today, args.host, args.port, args.window_ms / 1000, args.max_batch)
+  print(f"Servindo em http://{args.host}:{args.port}/predict (referência {pd.Timestamp(today).date()})")
+  server.serve_forever()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+from artifacts import file_fingerprint
+from features import FEATURES, treat_columns, reference_date, _parse_dates
+from instrumentation import stage
+from scoring import CHUNKSIZE, read_chunks, latest_date
+
+DATE_COLUMNS = ['Dt_Customer']
+
+
+def _integer_dtype(low, high):
+  for dtype in (np.int8, np.int16, np.int32, np.int64):
+    if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+      return np.dtype(dtype)
+  raise ValueError(f"valores fora do intervalo de int64: {low}, {high}")
+
+
+def _column_stats(chunk, stats):
+  for col in chunk.columns:
+    values = chunk[col]
+    col_stats = stats.setdefault(col, {'min': None, 'max': None, 'nan': False, 'integral': True, 'categorical': False, 'categories': set()})
+    if col in DATE_COLUMNS:
+      continue
+    if not pd.api.types.is_numeric_dtype(values):
+      col_stats['categorical'] = True
+      col_stats['categories'].update(values.dropna().unique().tolist())
+      col_stats['nan'] |= bool(values.isna().any())
+      continue
+
+    finite = values.dropna().to_numpy(dtype=float)
+    col_stats['nan'] |= len(finite) < len(values)
+    if len(finite):
+      col_stats['min'] = finite.min() if col_stats['min'] is None else min(col_stats['min'], finite.min())
+      col_stats['max'] = finite.max() if col_stats['max'] is None else max(col_stats['max'], finite.max())
+      col_stats['integral'] &= bool((finite == np.round(finite)).all())
+
+
+def _choose_dtypes(stats):
+  # O menor dtype que guarda cada coluna sem perda
+  dtypes, categories = {}, {}
+  for col, col_stats in stats.items():
+    if col in DATE_COLUMNS:
+      dtypes[col] = np.dtype('datetime64[D]')
+    elif col_stats['categorical']:
+      categories[col] = sorted(col_stats['categories'])
+      dtypes[col] = np.dtype(np.int8) if len(categories[col]) < 128 else np.dtype(np.int16)
+    elif col_stats['min'] is None:
+      dtypes[col] = np.dtype(np.float32) if col_stats['nan'] else np.dtype(np.int8)
+    elif col_stats['integral'] and not col_stats['nan']:
+      dtypes[col] = _integer_dtype(col_stats['min'], col_stats['max'])
+    elif col_stats['integral'] and max(abs(col_stats['min']), abs(col_stats['max'])) < 2 ** 24:
+      # float32 guarda inteiros exatos até 2**24 e ainda permite NaN
+      dtypes[col] = np.dtype(np.float32)
+    else:
+      dtypes[col] = np.dtype(np.float64)
+  return dtypes, categories
+
+
+def _encode(values, col, dtypes, categories):
+  if col in DATE_COLUMNS:
+    return _parse_dates(values.to_numpy()).astype('datetime64[D]')
+  if col in categories:
+    return pd.Categorical(values, categories=categories[col]).codes.astype(dtypes[col])
+  return values.to_numpy().astype(dtypes[col])
+
+
+class _NpyAppender:
+  # Escreve linhas no fim de um .npy sem saber o total de antemão; o cabeçalho é gravado no close
+
+  def __init__(self, path, dtype, width=None):
+    self.path = path
+    self.dtype = np.dtype(dtype)
+    self.width = width
+    self.rows = 0
+    self._raw = open(path + '.raw', 'wb')
+
+  def append(self, values):
+    values = np.ascontiguousarray(values, dtype=self.dtype)
+    self._raw.write(values.tobytes())
+    self.rows += len(values)
+
+  def close(self):
+    self._raw.close()
+    shape = (self.rows,) if self.width is None else (self.rows, self.width)
+    with open(self.path, 'wb') as out, open(self.path + '.raw', 'rb') as raw:
+      np.lib.format.write_array_header_2_0(out, {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': shape})
+      shutil.copyfileobj(raw, out)
+    os.remove(self.path + '.raw')
+
+
+@contextmanager
+def _exclusive(store_dir):
+  # Um conversor por vez para o mesmo store, mesmo entre processos (vários workers do Streamlit)
+  with open(store_dir + '.lock', 'w') as lock:
+    if fcntl is not None:
+      fcntl.flock(lock, fcntl.LOCK_EX)
+    yield
+
+
+def _versions(store_dir):
+  parent = os.path.dirname(os.path.abspath(store_dir))
+  prefix = os.path.basename(store_dir) + '.'
+  return [os.path.join(parent, name) for name in os.listdir(parent) if name.startswith(prefix) and os.path.isdir(os.path.join(parent, name)) and not os.path.islink(os.path.join(parent, name))]
+
+
+def _publish(store_dir, version_dir):
+  # store_dir é um link simbólico para a versão atual; trocar o link é atômico para quem lê
+  previous = os.path.realpath(store_dir) if os.path.islink(store_dir) else None
+  if os.path.isdir(store_dir) and not os.path.islink(store_dir):
+    shutil.rmtree(store_dir)
+  link = version_dir + '.link'
+  os.symlink(os.path.basename(version_dir), link)
+  os.replace(link, store_dir)
+
+  # A versão anterior fica para quem ainda está carregando dela; as mais antigas (e restos de conversões interrompidas) saem
+  keep = {os.path.realpath(version_dir), previous}
+  for path in _versions(store_dir):
+    if os.path.realpath(path) not in keep:
+      shutil.rmtree(path, ignore_errors=True)
+
+
+def convert(csv_path, store_dir, chunksize=CHUNKSIZE, today=None):
+  with _exclusive(store_dir):
+    # Outro processo pode ter convertido enquanto este esperava o lock
+    if is_current(store_dir, csv_path):
+      meta = load_meta(store_dir)
+      if today is None or meta['today'] == str(pd.Timestamp(today).date()):
+        return meta
+
+    version_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(store_dir)), prefix=os.path.basename(store_dir) + '.')
+    try:
+      meta = _convert(csv_path, version_dir, chunksize, today)
+    except BaseException:
+      shutil.rmtree(version_dir, ignore_errors=True)
+      raise
+    _publish(store_dir, version_dir)
+    return meta
+
+
+def _convert(csv_path, tmp_dir, chunksize, today):
+  # Primeira passada: total de linhas, faixas de valores, categorias e a data de referência
+  stats, rows, latest = {}, 0, np.datetime64('NaT')
+  with stage('csv_scan') as info:
+    for chunk in read_chunks(csv_path, chunksize):
+      _column_stats(chunk, stats)
+      rows += len(chunk)
+      if today is None:
+        latest = latest_date(latest, reference_date(chunk, is_original=True))
+    info['rows'] = rows
+  if today is None:
+    today = latest
+  dtypes, categories = _choose_dtypes(stats)
+
+  os.makedirs(os.path.join(tmp_dir, 'raw'))
+
+  # Segunda passada: colunas cruas com memmap e as features tratadas em int8
+  raw = {col: np.lib.format.open_memmap(os.path.join(tmp_dir, 'raw', f"{col}.npy"), mode='w+', dtype=dtype, shape=(rows,)) for col, dtype in dtypes.items()}
+  features = _NpyAppender(os.path.join(tmp_dir, 'features.npy'), np.int8, len(FEATURES))
+  row_index = _NpyAppender(os.path.join(tmp_dir, 'rows.npy'), _integer_dtype(0, max(rows - 1, 0)))
+  ids = _NpyAppender(os.path.join(tmp_dir, 'ids.npy'), dtypes['ID'])
+
+  start = 0
+  for chunk in read_chunks(csv_path, chunksize):
+    for col in dtypes:
+      raw[col][start:start + len(chunk)] = _encode(chunk[col], col, dtypes, categories)
+
+    with stage('treat_columns', rows=len(chunk)):
+      treated, treated_ids = treat_columns(chunk, is_original=True, today=today)
+    values = treated.to_numpy()
+    if len(values) and (values.min() < np.iinfo(np.int8).min or values.max() > np.iinfo(np.int8).max):
+      raise ValueError("features tratadas não cabem em int8")
+    features.append(values)
+    row_index.append(treated.index.to_numpy() - chunk.index[0] + start)
+    ids.append(treated_ids.to_numpy())
+    start += len(chunk)
+
+  for array in raw.values():
+    array.flush()
+  del raw
+  for appender in (features, row_index, ids):
+    appender.close()
+
+  meta = {
+      'source': list(file_fingerprint(csv_path)),
+      'rows': rows,
+      'today': str(pd.Timestamp(today).date()),
+      'columns': list(dtypes),
+      'categories': categories
+      }
+  with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+    json.dump(meta, f, indent=2)
+  return meta
+
+
+def load_meta(store_dir):
+  with open(os.path.join(store_dir, 'meta.json')) as f:
+    return json.load(f)
+
+
+def is_current(store_dir, csv_path):
+  try:
+    return load_meta(store_dir)['source'] == list(file_fingerprint(csv_path))
+  except (OSError, ValueError, KeyError):
+    return False
+
+
+def _load(store_dir, name):
+  return np.load(os.path.join(store_dir, name), mmap_mode='r')
+
+
+def load_raw(store_dir):
+  # Mesmo formato do pd.read_csv do arquivo original, mas com categorias e datas já convertidas
+  # Resolve o link uma vez: todos os arquivos vêm da mesma versão mesmo se outra for publicada no meio
+  store_dir = os.path.realpath(store_dir)
+  meta = load_meta(store_dir)
+  columns = {}
+  for col in meta['columns']:
+    values = _load(store_dir, os.path.join('raw', f"{col}.npy"))
+    if col in meta['categories']:
+      columns[col] = pd.Categorical.from_codes(values, categories=meta['categories'][col])
+    else:
+      columns[col] = values
+  return pd.DataFrame(columns, copy=False)
+
+
+def load_treated(store_dir):
+  # Mesmo resultado de treat_columns(..., is_original=True), com as features em int8 mapeadas do disco
+  store_dir = os.path.realpath(store_dir)
+  rows = _load(store_dir, 'rows.npy')
+  treated = pd.DataFrame(_load(store_dir, 'features.npy'), columns=FEATURES, index=pd.Index(rows, dtype=np.int64), copy=False)
+  ids = pd.Series(_load(store_dir, 'ids.npy'), index=treated.index, name='ID', copy=False)
+  return treated, ids
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Converte o marketing_campaign.csv em arrays NumPy tipados, lidos com memmap pelo app.")
+  parser.add_argument('input', nargs='?', default='marketing_campaign.csv')
+  parser.add_argument('--out', default=None, help="diretório de saída; por padrão <arquivo>.store")
+  parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+  args = parser.parse_args()
+
+  out = args.out or os.path.splitext(args.input)[0] + '.store'
+  meta = convert(args.input, out, args.chunksize)
+  print(f"{meta['rows']} linhas convertidas em {out}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,181 @@
+# treat_columns e scale_columns como estavam no app.py original, sem alterações: servem de referência nos testes
+import numpy as np
+import pandas as pd
+
+
+def treat_columns(df, is_original=False):
+  if is_original:
+    df = df.dropna()
+
+  # If buys on campaign
+  df['Buys_on_campaign'] = df['AcceptedCmp1'] + df['AcceptedCmp2'] + df['AcceptedCmp3'] + df['AcceptedCmp4'] + df['AcceptedCmp5'] + df['Response']
+  df = df.drop(['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'Response'], axis=1)
+
+  # Buys with discount
+  df['Num_purchases'] = df['NumCatalogPurchases'] + df['NumStorePurchases'] + df['NumWebPurchases']
+  
+  df = df[df['Num_purchases'] != 0]
+  df = df[df['NumDealsPurchases'] < df['Num_purchases']]
+  
+  df['Purchases_with_descount'] = df['NumDealsPurchases']/df['Num_purchases']*100
+  df['Purchases_with_descount'] = df['Purchases_with_descount'].clip(lower=0.1, upper=79)
+  
+  bins = [0, 20, 40, 60, 80]
+  labels = ['0-20', '20-40', '40-60', '60-80']
+  df['Purchases_with_descount'] = pd.cut(df['Purchases_with_descount'], bins=bins, labels=labels, right=False)
+  df['Purchases_with_descount'] = df['Purchases_with_descount'].replace({
+      '0-20' : 0,
+      '20-40' : 1,
+      '40-60' : 2,
+      '60-80' : 3
+      }).astype(int)
+      
+  # Buys_where
+  df['Catalog'] = df['NumCatalogPurchases']/df['Num_purchases']
+  df['Store'] = df['NumStorePurchases']/df['Num_purchases']
+  df['Web'] = df['NumWebPurchases']/df['Num_purchases']
+  
+  df['Preference'] = df[['Catalog', 'Store', 'Web']].idxmax(axis=1)
+  df['Preference'] = df['Preference'].replace({
+      'Catalog' : 0,
+      'Store' : 1,
+      'Web' : 2
+      }).astype(int)
+      
+  df = df.drop(['Num_purchases', 'NumCatalogPurchases', 'NumStorePurchases', 'NumWebPurchases', 'NumDealsPurchases', 'Catalog', 'Store', 'Web'], axis=1)
+
+  # How long is client
+  df['Dt_Customer'] = pd.to_datetime(df['Dt_Customer'], format='%d-%m-%Y')
+  today = df['Dt_Customer'].max()
+  
+  df['Is_client_since'] = (today - df['Dt_Customer']).dt.days
+  df['Is_client_since'] = df['Is_client_since'].clip(lower=0.1, upper=1099.99)
+  bins = [0, 275, 550, 825, 1100]
+  labels = ['0-275', '275-550', '550-825', '825-1100']
+  df['Is_client_since'] = pd.cut(df['Is_client_since'], bins=bins, labels=labels, right=False)
+  df['Is_client_since'] = df['Is_client_since'].replace({
+      '0-275' : 0,
+      '275-550' : 1,
+      '550-825' : 2,
+      '825-1100' : 3
+      }).astype(int)
+      
+  df = df.drop('Dt_Customer', axis=1)
+
+  # Is the client recently buying or not
+  bins = list(range(0, 101, 25))
+  labels = [f"{i}-{i+25}" for i in bins[:-1]]
+
+  df['Recency'] = df['Recency'].clip(lower=0.1, upper=99.99)
+  df['Recency'] = pd.cut(df['Recency'], bins=bins, labels=labels, right=False)
+  df['Is_buying'] = df['Recency'].replace({
+      '0-25' : 0,
+      '25-50' : 1,
+      '50-75' : 2,
+      '75-100' : 3
+      }).astype(int)
+      
+  df = df.drop('Recency', axis=1)
+
+  # Family size
+  df['Num_adults'] = df['Marital_Status'].replace({
+      'Married' : 2,
+      'Together' : 2,
+      'Single' : 1,
+      'Divorced' : 1,
+      'Widow' : 1,
+      'Alone' : 1,
+      'Absurd' : 1,
+      'YOLO' : 1
+      }).astype(int)
+      
+  df['Num_kids'] = df['Kidhome'] + df['Teenhome']
+  df['Family_size'] = df['Num_adults'] + df['Num_kids']
+  
+  # Have kids or not
+  df['Is_kids'] = np.where(df['Num_kids'] == 0, 0, 1)
+  
+  # Amount spent per person
+  df['Amount_spent'] = df['MntWines'] + df['MntFruits'] + df['MntMeatProducts'] + df['MntFishProducts'] + df['MntSweetProducts'] + df['MntGoldProds']
+  
+  df['Amount_spent_per_person'] = df['Amount_spent']/df['Family_size']
+  df['Amount_spent_per_person'] = df['Amount_spent_per_person'].clip(upper=699.99)
+  bins = [0, 175, 350, 525, 700]
+  labels = ['0-175', '175-350', '350-525', '525-700']
+  
+  df['Amount_spent_per_person'] = pd.cut(df['Amount_spent_per_person'], bins=bins, labels=labels, right=False)
+  df['Amount_spent_per_person'] = df['Amount_spent_per_person'].replace({
+      '0-175' : 0,
+      '175-350' : 1,
+      '350-525' : 2,
+      '525-700' : 3
+      }).astype(int)
+      
+  # Amount spent vs Income
+  df = df[df['Income'] <= 200000]
+  df = df.copy()
+  df['Spent_vs_income'] = df['Amount_spent']*100/df['Income']
+  df['Spent_vs_income'] = df['Spent_vs_income'].clip(upper=3.99)
+  bins = [0, 1, 2, 3, 4]
+  labels = ['0-1', '1-2', '2-3', '3-4']
+  df['Spent_vs_income'] = pd.cut(df['Spent_vs_income'], bins=bins, labels=labels, right=False)
+  df['Spent_vs_income'] = df['Spent_vs_income'].replace({
+      '0-1' : 0,
+      '1-2' : 1,
+      '2-3' : 2,
+      '3-4' : 3 
+      }).astype(int)
+      
+  # Drinks or not
+  df['Drinks'] = np.where(df['MntWines'] == 0, 0, 1)
+  
+  to_drop = ['Marital_Status', 'Kidhome', 'Teenhome', 'Num_kids', 'Num_adults',  'Amount_spent', 'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds', 'Income']
+  df = df.drop(to_drop, axis=1)
+
+  # Age from clients
+  df['Year_Birth'] = df['Year_Birth'].clip(lower=1900, upper=2000)
+  df = df.copy()
+  
+  bins = list(range(1900, 2001, 25))
+  labels = [f"{i}-{i+25}" for i in bins[:-1]]
+  
+  df['Year_Birth'] = pd.cut(df['Year_Birth'], bins=bins, labels=labels, right=False)
+  
+  df['Year_Birth'] = df['Year_Birth'].replace({
+      '1900-1925' : 0,
+      '1925-1950' : 1,
+      '1950-1975' : 2,
+      '1975-2000' : 3
+      }).astype(int)
+
+  df['Education'] = df['Education' ].replace({
+      'Basic' : 0,
+      '2n Cycle' : 1,
+      'Graduation' : 2,
+      'Master' : 3,
+      'PhD' : 4
+      }).astype(int)
+
+  ids = df['ID']
+  df = df.drop(['ID', 'NumWebVisitsMonth', 'Z_CostContact', 'Z_Revenue'], axis=1)
+  
+  return df, ids
+
+
+def scale_columns(df1):
+  df2 = df1.copy()
+  df2['Year_Birth'] = df2['Year_Birth']
+  df2['Education'] = df2['Education']
+  df2['Complain'] = df2['Complain']
+  df2['Buys_on_campaign'] = df2['Buys_on_campaign']
+  df2['Purchases_with_descount'] = df2['Purchases_with_descount']
+  df2['Preference'] = df2['Preference']
+  df2['Is_client_since'] = df2['Is_client_since']
+  df2['Is_buying'] = df2['Is_buying'] * 5
+  df2['Family_size'] = df2['Family_size']
+  df2['Is_kids'] = df2['Is_kids'] * 5
+  df2['Amount_spent_per_person'] = df2['Amount_spent_per_person']
+  df2['Spent_vs_income'] = df2['Spent_vs_income']
+  df2['Drinks'] = df2['Drinks'] * 5
+
+  return df2
@@ -0,0 +1,45 @@
+import os
+
+import joblib
+import pandas as pd
+import pytest
+
+from features import treat_columns, scale_columns
+from model import FastScorer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+  return joblib.load(os.path.join(ROOT, 'kmeans_pipeline.pkl'))
+
+
+@pytest.fixture(scope='module')
+def records():
+  df = pd.read_csv(os.path.join(ROOT, 'marketing_campaign.csv'), sep='\t').dropna()
+  records = df.to_dict('records')
+
+  # Clientes descartados pelos filtros: sem compras, só compras com desconto e renda acima de 200000
+  base = records[0]
+  records.append(dict(base, ID=-1, NumCatalogPurchases=0, NumStorePurchases=0, NumWebPurchases=0))
+  records.append(dict(base, ID=-2, NumDealsPurchases=base['NumCatalogPurchases'] + base['NumStorePurchases'] + base['NumWebPurchases']))
+  records.append(dict(base, ID=-3, Income=250000.0))
+  return records
+
+
+def pandas_path(pipeline, record, today):
+  treated, _ = treat_columns(pd.DataFrame([record]), today=today)
+  if len(treated) == 0:
+    return None
+  return int(pipeline.predict(scale_columns(treated))[0])
+
+
+@pytest.mark.parametrize('today', [None, '2014-12-31'])
+def test_fast_scorer_matches_pipeline(pipeline, records, today):
+  scorer = FastScorer(pipeline)
+  expected = [pandas_path(pipeline, record, today) for record in records]
+  result = [scorer.predict_record(record, today) for record in records]
+  assert result == expected
+  assert expected[-3:] == [None, None, None]
+  assert None in expected[:-3]
@@ -0,0 +1,80 @@
+import argparse
+import os
+import shutil
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from imblearn.pipeline import Pipeline
+from sklearn.cluster import MiniBatchKMeans
+
+from features import treat_columns, scale_columns
+from model import cluster_centers
+from scoring import CHUNKSIZE, read_chunks, find_reference_date
+
+
+def train(data_path, n_clusters=None, warm_start=None, chunksize=CHUNKSIZE, batch_size=4096, epochs=1, today=None, random_state=42):
+  # Treina com partial_fit bloco a bloco: a memória depende do chunksize, não do tamanho da base
+  if today is None:
+    today = find_reference_date(data_path, chunksize)
+
+  if warm_start is not None:
+    # Parte dos centroides atuais: os grupos continuam na mesma ordem de descricao_clusters
+    init = np.asarray(cluster_centers(joblib.load(warm_start)), dtype=float)
+    if n_clusters is not None and n_clusters != len(init):
+      raise ValueError(f"o modelo atual tem {len(init)} clusters, não {n_clusters}; use --cold-start para mudar o número de clusters")
+    kmeans = MiniBatchKMeans(n_clusters=len(init), init=init, n_init=1, batch_size=batch_size, random_state=random_state)
+  else:
+    kmeans = MiniBatchKMeans(n_clusters=8 if n_clusters is None else n_clusters, batch_size=batch_size, random_state=random_state)
+
+  rng = np.random.default_rng(random_state)
+  for _ in range(epochs):
+    for chunk in read_chunks(data_path, chunksize):
+      treated, _ = treat_columns(chunk, is_original=True, today=today)
+      scaled = scale_columns(treated)
+      scaled = scaled.iloc[rng.permutation(len(scaled))]
+      for start in range(0, len(scaled), batch_size):
+        batch = scaled.iloc[start:start + batch_size]
+        # O primeiro partial_fit precisa de ao menos n_clusters linhas para inicializar
+        if len(batch) >= kmeans.n_clusters or hasattr(kmeans, 'cluster_centers_'):
+          kmeans.partial_fit(batch)
+
+  if not hasattr(kmeans, 'cluster_centers_'):
+    raise ValueError(f"nenhum lote chegou a {kmeans.n_clusters} clientes válidos; aumente --chunksize ou --batch-size")
+  return Pipeline(steps=[('kmeans', kmeans)])
+
+
+def save_versioned(pipeline, model_path='kmeans_pipeline.pkl', promote=False):
+  base, ext = os.path.splitext(model_path)
+  version = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+  path = f"{base}-{version}{ext}"
+  joblib.dump(pipeline, path)
+
+  if promote:
+    # Troca atômica: o app recarrega sozinho ao perceber a mudança do arquivo
+    tmp = model_path + '.tmp'
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, model_path)
+  return path
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Retreina o KMeans em blocos (MiniBatchKMeans) e salva uma nova versão do pipeline.")
+  parser.add_argument('--data', default='marketing_campaign.csv')
+  parser.add_argument('--model', default='kmeans_pipeline.pkl', help="pipeline atual; as versões novas são salvas ao lado dele")
+  parser.add_argument('--clusters', type=int, default=None, help="número de clusters; por padrão o do modelo atual (8 com --cold-start)")
+  parser.add_argument('--cold-start', action='store_true', help="ignora os centroides do modelo atual")
+  parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+  parser.add_argument('--batch-size', type=int, default=4096)
+  parser.add_argument('--epochs', type=int, default=1)
+  parser.add_argument('--today', default=None, help="data de referência (YYYY-MM-DD); por padrão, a maior Dt_Customer da base")
+  parser.add_argument('--promote', action='store_true', help="substitui o pipeline atual pela versão nova")
+  args = parser.parse_args()
+
+  warm_start = None if args.cold_start else args.model
+  pipeline = train(args.data, args.clusters, warm_start, args.chunksize, args.batch_size, args.epochs, args.today)
+  print(save_versioned(pipeline, args.model, args.promote))
+
+
+if __name__ == '__main__':
+  main()